@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import radest
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Record layout of output files, the same as "radlist.py --format npy"
+RECORD_TYPE = np.dtype([("date", "<i8"), ("Rg", "<f4")])
+
+
+def ReadManifest(manifest):
+    """Reads a station manifest
+
+    The manifest is a comma-separated file with a header line and one
+    station per line, holding the same parameters as radlist.py:
+
+        lat, lon, fuse, height, initial, delta, num_steps, out
+
+    Parameters
+    ----------
+
+    manifest : str
+        Manifest file name
+
+    Returns
+    -------
+
+    list(dict)
+        Station parameters, one dictionary per station
+    """
+
+    stations = []
+    with open(manifest, "r") as f:
+        names = [name.strip() for name in f.readline().split(",")]
+        for line in f:
+            if line.strip() == "":
+                continue
+            fields = dict(zip(names, [field.strip() for field in line.split(",")]))
+            stations.append({
+                "lat":       float(fields["lat"]),
+                "lon":       float(fields["lon"]),
+                "fuse":      int(fields["fuse"]),
+                "height":    float(fields["height"]),
+                "initial":   np.datetime64(fields["initial"], 's'),
+                "delta":     int(fields["delta"]),
+                "num_steps": int(fields["num_steps"]),
+                "out":       fields["out"],
+            })
+    return stations
+
+
+def _run_chunk(station, i_first, i_last):
+    """Computes steps i_first to i_last-1 of a station, in the worker,
+    writing them straight into the station's memory-mapped output"""
+
+    data  = np.load(station["out"], mmap_mode="r+")
+    first = station["initial"] + np.timedelta64(i_first * station["delta"], 's')
+    i     = i_first
+    for tm, rg in radest.GlobalRadiationChunks(
+        first, station["delta"], i_last - i_first,
+        station["lat"], station["lon"], station["fuse"], station["height"]
+    ):
+        data["date"][i:i + len(tm)] = tm.astype(np.int64)
+        data["Rg"][i:i + len(tm)]   = rg
+        i += len(tm)
+    data.flush()
+
+
+def RunBatch(stations, workers=None, chunk_size=1000000):
+    """Generates global radiation series for many stations on a process pool
+
+    Each station's output is created in advance as a memory-mapped .npy
+    record array (int64 epoch seconds "date", float32 "Rg"); the work is
+    split in chunks of at most chunk_size steps, and every worker writes
+    its chunk directly into the output file, so no result array travels
+    back to the parent process.
+
+    Parameters
+    ----------
+
+    stations : list(dict)
+        Station parameters, as returned by ReadManifest
+
+    workers : int
+        Number of worker processes (default: number of CPUs)
+
+    chunk_size : int
+        Maximum number of time steps per task
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    # Create outputs
+    for station in stations:
+        data = np.lib.format.open_memmap(station["out"], mode="w+", dtype=RECORD_TYPE, shape=(station["num_steps"],))
+        del data
+
+    # Distribute chunks over the pool
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = []
+        for station in stations:
+            for i_first in range(0, station["num_steps"], chunk_size):
+                i_last = min(i_first + chunk_size, station["num_steps"])
+                tasks.append(pool.submit(_run_chunk, station, i_first, i_last))
+        for task in tasks:
+            task.result()
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        print("radbatch - Program generating global radiation estimates for many stations in parallel")
+        print()
+        print("Usage:")
+        print()
+        print("  ./radbatch.py <Manifest> [<Workers> [<Chunk_Size>]]")
+        print()
+        print("where")
+        print()
+        print("  <Manifest> is a CSV file with header line")
+        print("      lat, lon, fuse, height, initial, delta, num_steps, out")
+        print("    and one station per line, with the same meaning as radlist.py parameters;")
+        print("    each <out> is written as a .npy record array (int64 epoch seconds, float32 Rg)")
+        print("  <Workers> is the number of worker processes (default: number of CPUs)")
+        print("  <Chunk_Size> is the maximum number of time steps per task (default: 1000000)")
+        print()
+        print("This is open-source code, covered by the MIT license")
+        print()
+        sys.exit(1)
+    manifest   = sys.argv[1]
+    workers    = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 1000000
+
+    # Process all stations
+    RunBatch(ReadManifest(manifest), workers, chunk_size)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import radest
+import radout
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def _time_stamps(n):
+    """Regular one-minute series of n time stamps"""
+
+    return np.datetime64('2019-01-01T00:00:00', 's') + np.arange(n) * np.timedelta64(60, 's')
+
+
+def _stations(s):
+    """s stations spread over latitudes, longitudes and time zones"""
+
+    lat  = np.linspace(-60.0, 60.0, s)
+    lon  = np.linspace(-170.0, 170.0, s)
+    zone = np.round(lon / 15.0)
+    z    = np.linspace(0.0, 2000.0, s)
+    return lat, lon, zone, z
+
+
+def _site(s):
+    """Site parameters: scalars for one station, vectors otherwise"""
+
+    if s == 1:
+        return 45.5, 9.5, 1, 100.0
+    return _stations(s)
+
+
+def _radlist(n, s):
+    """The radlist.py workload for one station: chunked estimation, bulk CSV writing"""
+
+    lat, lon, zone, z = _site(1)
+    first = np.datetime64('2019-01-01T00:00:00', 's')
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        f = radout.CsvWriter(path, ["date", "Rg"])
+        for tm, rg in radest.GlobalRadiationChunks(first, 60, n, lat, lon, zone, z):
+            f.write(tm, rg)
+        f.close()
+    finally:
+        os.remove(path)
+
+
+# Benchmark cases: name -> (setup(n, s) returning call arguments, function to time, multi-station)
+CASES = {
+    "DoY": (
+        lambda n, s: (_time_stamps(n),),
+        radest.DoY, False),
+    "calcJD": (
+        lambda n, s: (_time_stamps(n),),
+        radest.calcJD, False),
+    "ExtraterrestrialRadiation": (
+        lambda n, s: (_time_stamps(n), 60) + _site(s)[:3],
+        radest.ExtraterrestrialRadiation, True),
+    "GlobalRadiation": (
+        lambda n, s: (radest.ExtraterrestrialRadiation(_time_stamps(n), 60, *_site(s)[:3]), _site(s)[3]),
+        radest.GlobalRadiation, True),
+    "radlist": (
+        lambda n, s: (n, s),
+        _radlist, False),
+    "timeq": (
+        lambda n, s: (np.datetime64('2019-01-01') + np.arange(n),) + _site(s)[:3],
+        radest.SolarTimes, True),
+}
+
+
+def RunBenchmarks(max_samples=1000000, max_stations=1000, repeat=3, cases=None):
+    """Times the radest hot paths over a range of sizes
+
+    Sample counts are the powers of ten up to max_samples; for the
+    multi-station cases, station counts are powers of ten up to
+    max_stations, limited so that samples times stations does not
+    exceed max_samples.
+
+    Parameters
+    ----------
+
+    max_samples : int
+        Largest number of samples (time stamps times stations)
+
+    max_stations : int
+        Largest number of stations
+
+    repeat : int
+        Number of timed runs per case; the best is retained
+
+    cases : list(str)
+        Names of cases to run (default: all)
+
+    Returns
+    -------
+
+    dict
+        Results by case key ("<case>/n=<samples>/s=<stations>"), each
+        with seconds, samples_per_s and peak_bytes
+    """
+
+    results = {}
+    for name in (cases or CASES):
+        setup, func, multi_station = CASES[name]
+        station_counts = [1]
+        while multi_station and station_counts[-1] * 10 <= max_stations:
+            station_counts.append(station_counts[-1] * 10)
+        for s in station_counts:
+            n = 1
+            while n * s <= max_samples:
+                args = setup(n, s)
+
+                # Peak memory, from a traced run
+                radest.DayCacheClear()
+                tracemalloc.start()
+                func(*args)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                # Best time over repeated, untraced runs
+                best = float("inf")
+                for i in range(repeat):
+                    radest.DayCacheClear()
+                    start = time.perf_counter()
+                    func(*args)
+                    best = min(best, time.perf_counter() - start)
+
+                results["%s/n=%d/s=%d" % (name, n, s)] = {
+                    "seconds":       best,
+                    "samples_per_s": n * s / best if best > 0.0 else float("inf"),
+                    "peak_bytes":    peak,
+                }
+                n *= 10
+    return results
+
+
+def CompareBaseline(results, baseline, threshold=20.0, min_time=0.01):
+    """Finds the cases whose throughput dropped below the baseline
+
+    Parameters
+    ----------
+
+    results : dict
+        Current results, as returned by RunBenchmarks
+
+    baseline : dict
+        Reference results, in the same form
+
+    threshold : double
+        Allowed throughput loss (%)
+
+    min_time : double
+        Cases faster than this in the baseline (s) are too noisy to gate
+
+    Returns
+    -------
+
+    list((str, double))
+        Key and throughput change (%) of each regressed case
+    """
+
+    regressions = []
+    for key, reference in baseline.items():
+        if key not in results or reference["seconds"] < min_time:
+            continue
+        change = 100.0 * (results[key]["samples_per_s"] / reference["samples_per_s"] - 1.0)
+        if change < -threshold:
+            regressions.append((key, change))
+    return regressions
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    parser = argparse.ArgumentParser(description="radbench - Benchmarks of the radest hot paths")
+    parser.add_argument("--max-samples", type=float, default=1.e6, help="largest number of samples (default 1e6; up to 1e8)")
+    parser.add_argument("--max-stations", type=int, default=1000, help="largest number of stations (default 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default 3)")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="case to run (repeatable; default all)")
+    parser.add_argument("--save", metavar="FILE", help="write results to FILE as JSON, e.g. to make a baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with baseline FILE, failing on regressions")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed throughput loss (%%, default 20)")
+    parser.add_argument("--min-time", type=float, default=0.01, help="baseline cases faster than this (s) are not gated")
+    args = parser.parse_args()
+
+    # Run and report
+    results = RunBenchmarks(int(args.max_samples), args.max_stations, args.repeat, args.case)
+    print("%-45s %12s %14s %14s" % ("case", "seconds", "samples/s", "peak MB"))
+    for key, result in results.items():
+        print("%-45s %12.6f %14.4e %14.3f" % (key, result["seconds"], result["samples_per_s"], result["peak_bytes"] / 2**20))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+
+    # Check for regressions
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = CompareBaseline(results, baseline, args.threshold, args.min_time)
+        for key, change in regressions:
+            print("REGRESSION %s: throughput %+.1f%%" % (key, change))
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import radest
+import sys
+import threading
+
+
+def _minutes(first, n, step=60):
+    """Regular series of n time stamps, step seconds apart"""
+
+    return np.datetime64(first, 's') + np.arange(n) * np.timedelta64(step, 's')
+
+
+# Conformance cases: name -> (time stamps, averaging period, lat, lon, zone)
+CASES = {
+    "one-site-minutes": (
+        _minutes('2019-01-01T00:00:00', 525600), 60, 45.5, 9.5, 1),
+    "one-site-seconds": (
+        _minutes('2019-06-21T00:00:00', 86400, 1), 1, 45.5, 9.5, 1),
+    "one-site-days": (
+        _minutes('2019-01-01T00:00:00', 365, 86400), 86400, 45.5, 9.5, 1),
+    "polar-stations": (
+        _minutes('2019-01-01T00:00:00', 8760, 3600), 3600,
+        np.array([-90.0, -80.0, -66.6, -66.5, 0.0, 66.5, 66.6, 80.0, 90.0]),
+        np.array([0.0, 10.0, -170.0, 45.0, 179.9, -45.0, 25.0, 100.0, -179.9]),
+        np.array([0, 1, -11, 3, 12, -3, 2, 7, -12])),
+    "sparse-series": (
+        np.datetime64('2000-01-01T00:00:00', 's')
+        + np.sort(np.random.default_rng(0).integers(0, 40 * 365 * 86400, 100000)) * np.timedelta64(1, 's'),
+        600, 38.0, -122.0, -8),
+    "nan-latitude": (
+        _minutes('2019-06-21T00:00:00', 1440), 60,
+        np.array([45.5, np.nan, -33.9]), np.array([9.5, 9.5, 18.4]), np.array([1, 1, 2])),
+}
+
+# Largest error accepted, relative to the largest reference value, by
+# result type; float32 loses up to about 1e-3 with 1 s periods (see
+# radest.ExtraterrestrialRadiation)
+TOLERANCES = {np.dtype(np.float64): 1.e-12, np.dtype(np.float32): 2.e-3}
+
+
+def CheckBackend(name, dtype=np.float64):
+    """Compares a compute backend with the float64 NumPy backend on CASES
+
+    Parameters
+    ----------
+
+    name : str
+        Backend name, as in radest.SetBackend
+
+    dtype : numpy.dtype
+        Type of the backend computation
+
+    Returns
+    -------
+
+    list((str, double, bool))
+        For each case: name, largest absolute error relative to the
+        largest reference value, and whether it is within TOLERANCES,
+        with NaN exactly where the reference has NaN
+    """
+
+    previous = radest.GetBackend()
+    results  = []
+    try:
+        for case, (time_stamp, averaging_period, lat, lon, zone) in CASES.items():
+            radest.SetBackend("numpy")
+            reference = radest.ExtraterrestrialRadiation(time_stamp, averaging_period, lat, lon, zone)
+            radest.SetBackend(name)
+            ra = radest.ExtraterrestrialRadiation(time_stamp, averaging_period, lat, lon, zone, dtype=dtype)
+            nan   = np.isnan(reference)
+            valid = ~nan & ~np.isnan(ra)
+            error = float(np.max(np.abs(ra[valid] - reference[valid])) / np.max(reference[valid]))
+            ok = (ra.dtype == np.dtype(dtype) and np.array_equal(np.isnan(ra), nan) and np.all(ra[valid] >= 0.0)
+                  and error <= TOLERANCES[np.dtype(dtype)])
+            results.append((case, error, bool(ok)))
+    finally:
+        radest.SetBackend(previous)
+    return results
+
+
+def CheckThreads(num_threads=4, calls=6):
+    """Stress-tests concurrent multithreaded calls at different worker counts
+
+    num_threads threads make calls with workers=2 while another raises
+    workers from 3 upwards, so that the shared thread pool is replaced
+    while in use. Every call must succeed, and match the serial result.
+
+    Parameters
+    ----------
+
+    num_threads : int
+        Number of threads calling with workers=2
+
+    calls : int
+        Number of calls per thread
+
+    Returns
+    -------
+
+    (int, int)
+        Number of calls which raised, and of calls whose result differs
+        from the serial one
+    """
+
+    time_stamp = _minutes('2019-01-01T00:00:00', 200 * 8640, 10)
+    reference  = radest.ExtraterrestrialRadiation(time_stamp, 10, 45.5, 9.5, 1, workers=1)
+    failures   = []
+
+    def caller(workers):
+        for i in range(calls):
+            try:
+                ra = radest.ExtraterrestrialRadiation(time_stamp, 10, 45.5, 9.5, 1,
+                                                      workers=workers if workers is not None else 3 + i)
+                if not np.array_equal(ra, reference):
+                    failures.append("differs")
+            except Exception as error:
+                failures.append(error)
+
+    threads = [threading.Thread(target=caller, args=(2,)) for k in range(num_threads)]
+    threads.append(threading.Thread(target=caller, args=(None,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    differs = sum(1 for failure in failures if isinstance(failure, str))
+    return len(failures) - differs, differs
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    if sys.argv[1:] == ["--threads"]:
+        raised, differs = CheckThreads()
+        print("concurrent calls: %d raised, %d differ  %s" % (raised, differs, "ok" if raised + differs == 0 else "FAIL"))
+        sys.exit(1 if raised + differs > 0 else 0)
+    names = sys.argv[1:] if len(sys.argv) > 1 else list(radest.BACKENDS)
+    if any(name not in radest.BACKENDS for name in names):
+        print("radcheck - Program checking the numerical conformance of radest compute backends")
+        print()
+        print("Usage:")
+        print()
+        print("  ./radcheck.py [<Backend> ...]")
+        print("  ./radcheck.py --threads")
+        print()
+        print("where")
+        print()
+        print("  <Backend> is one of %s (default: all)" % ", ".join(radest.BACKENDS))
+        print()
+        print("Backends whose packages are not installed are reported and skipped.")
+        print("The exit status is 1 if any available backend fails.")
+        print()
+        print("With --threads, concurrent calls at different worker counts are stress-tested.")
+        print()
+        print("This is open-source code, covered by the MIT license")
+        print()
+        sys.exit(1)
+
+    # Check each backend, in both precisions
+    available = radest.AvailableBackends()
+    failed    = False
+    with np.errstate(invalid="ignore"):
+        for name in names:
+            if name not in available:
+                print("%-8s not installed, skipped" % name)
+                continue
+            for dtype in (np.float64, np.float32):
+                for case, error, ok in CheckBackend(name, dtype):
+                    print("%-8s %-8s %-18s %12.3e  %s" % (name, np.dtype(dtype).name, case, error, "ok" if ok else "FAIL"))
+                    failed = failed or not ok
+    if failed:
+        sys.exit(1)
@@ -41,8 +41,155 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 
 
-import math
+import functools
+import os
+import threading
 import numpy as np
+import radprof
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Solar constant, as used by the ASCE method
+SOLAR_CONSTANT = 1.e5 * 49.2/3600   # W/m2
+
+# Maximum number of (day range, latitudes) entries held by the day-level cache
+DAY_CACHE_SIZE = 64
+
+# Largest day table held by the day-level cache, in values (days x
+# (stations + 4)): with DAY_CACHE_SIZE entries, the cache holds at most
+# 32 MB; larger tables are computed on each call, and freed after it
+DAY_CACHE_MAX_ELEMENTS = 1 << 16
+
+# Number of elements (stations x time stamps) processed per block by
+# ExtraterrestrialRadiation, which bounds the size of its scratch buffers
+BLOCK_SIZE = 65536
+
+# Smallest number of elements worth a thread of its own, when a call is
+# split over several workers
+MIN_WORKER_SIZE = 4 * BLOCK_SIZE
+
+
+# Counts of datetime64 units per day, for units the day is a multiple of
+_UNITS_PER_DAY = {
+    'D': 1, 'h': 24, 'm': 1440, 's': 86400,
+    'ms': 86400 * 10**3, 'us': 86400 * 10**6, 'ns': 86400 * 10**9, 'ps': 86400 * 10**12,
+}
+
+
+def _epoch_days(time_stamp, period=1):
+    """Days since 1970-01-01, and time since start of day, of time stamps
+
+    Both are obtained from the integer epoch values of the time stamps,
+    in whatever datetime64 unit they are expressed. The time of day is
+    the integer remainder divided once by the length of period in the
+    unit of the time stamps, which rounds as the division of timedeltas.
+
+    Parameters
+    ----------
+
+    time_stamp : numpy.array(numpy.datetime64)
+        Time stamps, in any unit down to 'ps'
+
+    period : int
+        Unit of time of day (s), e.g. 3600 for hours
+
+    Returns
+    -------
+
+    (numpy.array(int), numpy.array(double))
+        Days since 1970-01-01, and time since start of day (in units of
+        period)
+    """
+
+    time_stamp = np.asarray(time_stamp)
+    if not np.issubdtype(time_stamp.dtype, np.datetime64):
+        raise ValueError("Time stamps must be of type datetime64")
+    unit, count = np.datetime_data(time_stamp.dtype)
+    values = time_stamp.view(np.int64)
+    if count != 1:
+        values = values * count
+    if unit in _UNITS_PER_DAY:
+        units_per_day = _UNITS_PER_DAY[unit]
+        if units_per_day == 1:
+            return values.copy(), np.zeros(values.shape)
+        days, remainder = np.divmod(values, units_per_day)
+        if units_per_day > 86400:
+            return days, remainder / ((units_per_day // 86400) * period)
+        return days, (remainder * (86400 // units_per_day)) / period
+    if unit in ('W', 'M', 'Y'):
+        return time_stamp.astype('datetime64[D]').view(np.int64), np.zeros(values.shape)
+    raise ValueError("Unsupported datetime64 unit '%s'" % unit)
+
+
+def _civil_by_cast(days):
+    """Year, month, day and day-of-year of days since 1970-01-01, by datetime64 casts"""
+
+    days   = np.asarray(days, dtype=np.int64)
+    months = days.view('datetime64[D]').astype('datetime64[M]').view(np.int64)
+    years  = months // 12
+    year_start  = years.view('datetime64[Y]').astype('datetime64[D]').view(np.int64)
+    month_start = months.view('datetime64[M]').astype('datetime64[D]').view(np.int64)
+    return years + 1970, months - 12 * years + 1, days - month_start + 1, days - year_start + 1
+
+
+def _civil_terms(days):
+    """Calendar terms of days since 1970-01-01, as index and tables
+
+    As with _day_terms, the terms are computed once per distinct day
+    when the days span a range no longer than their number, and are
+    then looked up through the index; otherwise they are computed for
+    each element, and the index is Ellipsis.
+
+    Parameters
+    ----------
+
+    days : numpy.array(int)
+        Days since 1970-01-01
+
+    Returns
+    -------
+
+    (numpy.array(int), tuple(numpy.array(int)))
+        Index into the tables, and tables of year, month, day of month
+        and day of year
+    """
+
+    days = np.asarray(days)
+    if days.size > 0:
+        first_day = int(days.min())
+        num_days  = int(days.max()) - first_day + 1
+        if num_days <= days.size:
+            return days - first_day, _civil_by_cast(np.arange(first_day, first_day + num_days))
+    return Ellipsis, _civil_by_cast(days)
+
+
+def Calendar(time_stamp):
+    """Decomposes time stamps into calendar terms
+
+    All terms are derived by integer arithmetic from the epoch values of
+    the time stamps, which are read once, whatever their datetime64 unit.
+
+    Parameters
+    ----------
+
+    time_stamp : numpy.array(numpy.datetime64)
+        Time stamps, in any unit down to 'ps'
+
+    Returns
+    -------
+
+    (numpy.array(int), numpy.array(int), numpy.array(int), numpy.array(int), numpy.array(int), numpy.array(double))
+        Year, month (1 to 12), day of month, day of year (1 to 366),
+        julian day, as computed by calcJD, and seconds since start of day
+    """
+
+    with radprof.Stage("radest.calendar", np.size(time_stamp)):
+        days, seconds = _epoch_days(time_stamp)
+        index, (year, month, day, doy) = _civil_terms(days)
+        year, month, day, doy = year[index], month[index], day[index], doy[index]
+        jd = days + 2440587
+
+    return year[()], month[()], day[()], doy[()], jd[()], seconds[()]
 
 
 def DoY(time_stamp):
@@ -61,11 +208,11 @@ def DoY(time_stamp):
         in same order.
     """
 
-    base_time = time_stamp.astype('datetime64[Y]')
-    delta_times = (time_stamp - base_time)
-    num_days  = (delta_times/np.timedelta64(1,'D')).astype(int) + 1
+    with radprof.Stage("radest.DoY", np.size(time_stamp)):
+        index, (year, month, day, doy) = _civil_terms(_epoch_days(time_stamp)[0])
+        num_days = doy[index]
 
-    return num_days
+    return num_days[()]
 
 
 def calcJD(time_stamp):
@@ -84,126 +231,845 @@ def calcJD(time_stamp):
         in same order.
     """
 
-    # Get date parts
-    yy = time_stamp.astype('datetime64[Y]').astype(int) + 1970
-    mm = time_stamp.astype('datetime64[M]').astype(int) % 12 + 1
-    dd = ((time_stamp - time_stamp.astype('datetime64[M]')) / np.timedelta64(1,'D') + 1).astype(int)
+    # Julian day at 00:00 of each date, truncated (Gregorian calendar)
+    with radprof.Stage("radest.calcJD", np.size(time_stamp)):
+        jd = _epoch_days(time_stamp)[0] + 2440587
 
-    # Compute Julian days
-    yy = np.where(mm <= 2, yy-1, yy)
-    mm = np.where(mm <= 2, mm+12, mm)
-    A  = yy // 100
-    B  = 2 - A + A//4
-    jd = (np.floor(365.25*(yy + 4716)) + np.floor(30.6001*(mm+1)) + dd + B - 1524.5).astype(int)
+    return jd[()]
 
-    return jd
 
+def _site_parameters(*values):
+    """Broadcasts site parameters to a common station layout
 
-def ExtraterrestrialRadiation(time_stamp, averaging_period, lat, lon, zone):
-    """Estimates extraterrestrial solar radiation by ASCE method
+    Parameters
+    ----------
+
+    values : double or array-like(double)
+        Site parameters (latitude, longitude, zone, height, ...)
+
+    Returns
+    -------
+
+    list(numpy.array(double))
+        The parameters, as 0-d arrays if all of them were scalars, or as
+        (stations x 1) columns otherwise, ready to broadcast against
+        a time axis.
+    """
+
+    values = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+    if values[0].ndim > 1:
+        raise ValueError("Site parameters must be scalars or 1-D station vectors")
+    if values[0].ndim == 1:
+        values = [v[:, np.newaxis] for v in values]
+    return values
+
+
+def _day_table(days, lat):
+    """Computes the astronomical terms depending on day and latitude only
 
     Parameters
     ----------
 
-    timeStamp : numpy.array(numpy.datetime64)
-        Anticipated time stamp of period to get radiation at
+    days : numpy.array(numpy.datetime64)
+        Vector of days, in 'D' units
 
-    averagingPeriod : int
-        Length of period (s)
+    lat : numpy.array(double)
+        Latitude, as 0-d array or (stations x 1) column (degrees)
 
-    lat : double
-        Local latitude(degrees, positive northwards)
+    Returns
+    -------
 
-    lon : double
-        Local longitude(degrees, positive eastwards)
+    tuple(numpy.array(double))
+        dr, Sc, sine and cosine of solar declination, by day, and
+        sunset angle by day (and station)
+    """
 
-    zone : int
-        Time zone number(hours, positive Eastwards, in range - 12 to 12)
+    doy = DoY(days)
+    solar_declination = 0.409 * np.sin(2*np.pi /365 * doy - 1.39)
+    dr = 1.0 + 0.033 * np.cos(2.0 * np.pi * doy / 365.0)
+    b = 2.0 * np.pi * (doy - 81) / 364.0
+    Sc = 0.1645 * np.sin(2.0 * b) - 0.1255 * np.cos(b) - 0.025 * np.sin(b)
+    omegaS = np.arccos(-np.tan(lat * np.pi / 180.0) * np.tan(solar_declination))    # Sunset angle
+    return dr, Sc, np.sin(solar_declination), np.cos(solar_declination), omegaS
+
+
+def _cached_day_table(first_day, num_days, lat_shape, lat_values):
+    """Day table for a contiguous range of days, in hashable form for the LRU cache"""
+
+    days = np.datetime64(first_day, 'D') + np.arange(num_days)
+    lat  = np.array(lat_values, dtype=float).reshape(lat_shape)
+    table = _day_table(days, lat)
+    for term in table:
+        term.flags.writeable = False
+    return table
+
+
+_day_cache = functools.lru_cache(maxsize=DAY_CACHE_SIZE)(_cached_day_table)
+
+
+def _dense_day_table(first_day, num_days, lat, cache=True):
+    """Day table for num_days contiguous days starting at first_day (days since epoch)"""
+
+    cache     = cache and num_days * (lat.size + 4) <= DAY_CACHE_MAX_ELEMENTS
+    day_table = _day_cache if cache else _cached_day_table
+    return day_table(first_day, num_days, lat.shape, tuple(lat.ravel().tolist()))
+
+
+def _day_terms(day_start, lat, cache=True):
+    """Computes the day-level terms once per day and latitude
+
+    Parameters
+    ----------
+
+    day_start : numpy.array(numpy.datetime64)
+        Day of each time stamp, in 'D' units
+
+    lat : numpy.array(double)
+        Latitude, as 0-d array or (stations x 1) column (degrees)
+
+    cache : bool
+        If False, the day-level cache is neither used nor filled
 
     Returns
     -------
 
-    numpy.array(double)
-        Vector containing extraterrestrial radiation (W/m2)
+    (numpy.array(int), tuple(numpy.array(double)))
+        Index of each time stamp into the day table, and the day table
+        itself, as returned by _day_table
     """
 
-    # Constants
-    SOLAR_CONSTANT = 1.e5 * 49.2/3600   # W/m2
+    days = day_start.astype(np.int64)
+    if days.size > 0:
+        first_day = int(days.min())
+        num_days  = int(days.max()) - first_day + 1
+    if days.size > 0 and num_days <= days.size:
+        # Dense series: one table entry per day in range, shared through the cache
+        table = _dense_day_table(first_day, num_days, lat, cache)
+        index = days - first_day
+    else:
+        # Sparse series: one table entry per distinct day
+        unique_days, index = np.unique(days, return_inverse=True)
+        table = _day_table(unique_days.astype('datetime64[D]'), lat)
+    return index, table
 
-    # Calculate the day-in-year and solar declination
-    doy = DoY(time_stamp)
-    solar_declination = 0.409 * np.sin(2*np.pi /365 * doy - 1.39)
 
-    # Compute Julian day
-    day_start = np.array([np.datetime64(time_stamp[i], 'D') for i in range(len(time_stamp))])
-    one_hour  = np.timedelta64(3600,'s')
-    timenow   = (time_stamp - day_start)/one_hour
-    timenow   -= zone
-    JD = calcJD(time_stamp)
+def DayCacheInfo():
+    """Reports the usage of the day-level cache
 
-    # Inverse squared relative distance factor for Sun-Earth
-    dr = 1.0 + 0.033 * np.cos(2.0 * np.pi * doy / 365.0)
+    Returns
+    -------
+
+    functools._CacheInfo
+        Named tuple with hits, misses, maxsize and currsize
+    """
+
+    return _day_cache.cache_info()
+
+
+def DayCacheClear():
+    """Empties the day-level cache, and resets its counters"""
+
+    _day_cache.cache_clear()
+
+
+def SetDayCacheSize(maxsize):
+    """Sets the maximum number of entries of the day-level cache
+
+    Parameters
+    ----------
+
+    maxsize : int
+        New cache size; 0 disables caching, None removes the bound
+    """
+
+    global _day_cache
+    _day_cache = functools.lru_cache(maxsize=maxsize)(_cached_day_table)
+
+
+def _time_zone(zone, num_times):
+    """Returns zone as an array aligned with the time axis, or None if it is a site parameter
+
+    A zone is aligned with the time axis if it is a (stations x time
+    stamps) or (1 x time stamps) matrix; vectors are always station
+    vectors, whatever their length.
+    """
+
+    zone = np.asarray(zone, dtype=float)
+    if zone.ndim == 2:
+        if zone.shape[1] != num_times:
+            raise ValueError("zone has %d columns, expected one per time stamp (%d)" % (zone.shape[1], num_times))
+        return zone
+    return None
+
+
+def _zone_breaks(time_zone):
+    """Positions along the time axis where a time-aligned zone changes, for any station"""
+
+    changed = np.any(time_zone[:, 1:] != time_zone[:, :-1], axis=0)
+    return np.flatnonzero(changed) + 1
+
+
+def _zone_runs(time_zone, breaks, first, last, lon, dtype, max_runs=64):
+    """Splits time stamps first to last-1 into runs of constant time-aligned zone
+
+    Returns a list of (start, end, zone, longitude term) tuples, with
+    start and end relative to first and zone and term shaped to broadcast
+    over the run; if the zone changes more than max_runs times, a single
+    run with per-time-stamp zone and term is returned instead.
+    """
+
+    inner = breaks[np.searchsorted(breaks, first, 'right'):np.searchsorted(breaks, last, 'left')]
+    if len(inner) > max_runs:
+        zone = time_zone[..., first:last]
+        return [(0, last - first, zone.astype(dtype), (0.06667 * _delta_lon(lon, zone)).astype(dtype))]
+    edges = [first] + inner.tolist() + [last]
+    runs  = []
+    for a, b in zip(edges[:-1], edges[1:]):
+        zone = time_zone[..., a:a + 1]
+        runs.append((a - first, b - first, zone.astype(dtype), (0.06667 * _delta_lon(lon, zone)).astype(dtype)))
+    return runs
+
+
+def _delta_lon(lon, zone):
+    """Signed longitude difference between time zone central meridian and site
+
+    Parameters
+    ----------
+
+    lon : numpy.array(double)
+        Local longitude(degrees, positive eastwards)
+
+    zone : numpy.array(double)
+        Time zone number(hours, positive Eastwards)
+
+    Returns
+    -------
+
+    numpy.array(double)
+        Longitude difference (degrees), as used in the solar time angle
+    """
 
     # Calculate geographical positioning parameters (with a "-" sign for longitudes, according to ASCE conventions)
     central_meridian_longitude = -zone * 15.0
-    if central_meridian_longitude < 0.0:
-        central_meridian_longitude += 360.0
+    central_meridian_longitude = np.where(central_meridian_longitude < 0.0, central_meridian_longitude + 360.0, central_meridian_longitude)
     local_longitude = -lon
-    if local_longitude < 0.0:
-        local_longitude += 360.0
+    local_longitude = np.where(local_longitude < 0.0, local_longitude + 360.0, local_longitude)
 
-    # Compute hour at mid of averaging time
-    t1 = averaging_period / 3600.0
-    t = timenow + zone + 0.5 * t1
+    delta_lon = np.fabs(central_meridian_longitude - local_longitude) % 360.0
+    intermediate = np.where(delta_lon > 180.0, 360.0 - delta_lon, delta_lon)
+    sign = np.where(((delta_lon > 0.0) & (delta_lon <= 180.0)) | ((delta_lon <= -180.0) & (delta_lon >= -360.0)), 1.0, -1.0)
+    return sign * intermediate
 
-    # Calculate seasonal correction for solar time
-    b = 2.0 * np.pi * (doy - 81) / 364.0
-    Sc = 0.1645 * np.sin(2.0 * b) - 0.1255 * np.cos(b) - 0.025 * np.sin(b)
 
-    # Solar time angle at midpoint of averaging time
-    delta_lon = math.fabs(central_meridian_longitude - local_longitude) % 360.0
-    if delta_lon > 180.0:
-        intermediate = 360.0 - delta_lon
-    else:
-        intermediate = delta_lon
-    if ((delta_lon > 0.0) and (delta_lon <= 180.0)) or ((delta_lon <= -180.0) and (delta_lon >= -360.0)):
-        sign =  1.0
-    else:
-        sign = -1.0
-    delta_lon = sign * intermediate
-    omega = (np.pi / 12.0) * ((t + 0.06667 * delta_lon + Sc) - 12.0)
+class RegularGrid:
+    """Evenly spaced time stamps, described by first, step and count
+
+    Parameters
+    ----------
 
-    # Solar time angle at beginning and end of averaging period
-    omega1 = omega - np.pi * t1 / 24.0
-    omega2 = omega + np.pi * t1 / 24.0
+    first : numpy.datetime64
+        First time stamp (rounded to the second)
 
-    # Adjust angular end points to exclude nighttime hours
-    omegaS = np.arccos(-np.tan(lat * np.pi / 180.0) * np.tan(solar_declination))    # Sunset angle
-    for i in range(len(omegaS)):
-        if omega1[i] < -omegaS[i]:
-            omega1[i] = -omegaS[i]
-        if omega2[i] < -omegaS[i]:
-            omega2[i] = -omegaS[i]
-        if omega1[i] > omegaS[i]:
-            omega1[i] = omegaS[i]
-        if omega2[i] > omegaS[i]:
-            omega2[i] = omegaS[i]
-        if omega1[i] > omega2[i]:
-            omega1[i] = omega2[i]
-
-    # Compute extraterrestrial radiation
-    ra = 12.0 / np.pi * SOLAR_CONSTANT * dr * (
-        (omega2-omega1) * np.sin(lat * np.pi / 180.0) * np.sin(solar_declination) +
-        np.cos(lat * np.pi / 180.0) * np.cos(solar_declination) * (np.sin(omega2) - np.sin(omega1))
+    step : int
+        Time step (s, positive)
+
+    count : int
+        Number of time stamps
+    """
+
+    def __init__(self, first, step, count):
+        if int(step) <= 0:
+            raise ValueError("step must be positive")
+        if int(count) < 0:
+            raise ValueError("count must not be negative")
+        self.first = np.datetime64(first, 's')
+        self.step  = int(step)
+        self.count = int(count)
+        self.epoch = int(self.first.astype(np.int64))
+
+    def __len__(self):
+        return self.count
+
+    def time_stamps(self, i_first=0, i_last=None):
+        """Materializes time stamps i_first to i_last-1 (default: all)"""
+
+        if i_last is None:
+            i_last = self.count
+        return self.first + np.arange(i_first, i_last) * np.timedelta64(self.step, 's')
+
+
+class Workspace:
+    """Scratch buffers for ExtraterrestrialRadiation, reusable across calls
+
+    Buffers are allocated on first use and grown only when a larger
+    block is requested, so repeated calls do not allocate.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.workers = {}
+
+    def get(self, name, shape, dtype):
+        """Returns the named buffer, viewed with the desired shape and type"""
+
+        size = int(np.prod(shape))
+        buf  = self.buffers.get(name)
+        if buf is None or buf.dtype != dtype or buf.size < size:
+            buf = np.empty(size, dtype=dtype)
+            self.buffers[name] = buf
+        return buf[:size].reshape(shape)
+
+    def worker(self, k):
+        """Returns the workspace of the k-th worker thread"""
+
+        if k == 0:
+            return self
+        return self.workers.setdefault(k, Workspace())
+
+
+_workers       = 1
+_executor      = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def SetWorkers(workers):
+    """Sets the default number of threads evaluating a single call
+
+    Parameters
+    ----------
+
+    workers : int
+        Number of threads; 1 (the default) evaluates serially, None
+        uses one thread per CPU
+    """
+
+    global _workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be positive")
+    _workers = int(workers)
+
+
+def GetWorkers():
+    """Returns the default number of threads evaluating a single call"""
+
+    return _workers
+
+
+if os.environ.get("RADEST_WORKERS"):
+    SetWorkers(int(os.environ["RADEST_WORKERS"]))
+
+
+def _split(num_times, num_stations, block, workers):
+    """Splits the time axis into contiguous runs of whole blocks, one per worker
+
+    Returns the run boundaries; a single run if the call is too small
+    to be worth splitting.
+    """
+
+    if workers is None:
+        workers = _workers
+    num_blocks = -(-num_times // block)
+    workers    = max(1, min(workers, num_blocks, num_times * num_stations // MIN_WORKER_SIZE))
+    return [min(num_times, (k * num_blocks // workers) * block) for k in range(workers + 1)]
+
+
+def _run_split(run, bounds, workspace):
+    """Calls run(first, last, workspace) on each run of bounds, on the thread pool"""
+
+    global _executor, _executor_size
+    if len(bounds) == 2:
+        run(bounds[0], bounds[1], workspace)
+        return
+    # A pool too small is replaced, never shut down: concurrent calls may
+    # still be submitting to it, and its threads exit once they drop it
+    with _executor_lock:
+        if _executor_size < len(bounds) - 1:
+            _executor      = ThreadPoolExecutor(max_workers=len(bounds) - 1)
+            _executor_size = len(bounds) - 1
+        executor = _executor
+    tasks = [
+        executor.submit(run, bounds[k], bounds[k + 1], workspace.worker(k))
+        for k in range(len(bounds) - 1)
+    ]
+    for task in tasks:
+        task.result()
+
+
+def _ra_kernel(omega, half_period, omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr, out, omega1, omega2, mask):
+    """Extraterrestrial radiation from solar time angles, computed in place
+
+    All arguments are arrays broadcasting to the shape of out, except
+    half_period, a scalar. omega holds the solar time angle at the
+    midpoint of averaging periods and is overwritten; omega1, omega2
+    and mask are scratch buffers shaped as out.
+
+    Parameters
+    ----------
+
+    omega : numpy.array(double)
+        Solar time angle at midpoint of averaging period (rad)
+
+    half_period : double
+        Half the averaging period, as solar time angle (rad)
+
+    omegaS : numpy.array(double)
+        Sunset angle (rad)
+
+    sin_lat, cos_lat : numpy.array(double)
+        Sine and cosine of latitude
+
+    sin_decl, cos_decl : numpy.array(double)
+        Sine and cosine of solar declination
+
+    dr : numpy.array(double)
+        Inverse squared relative distance factor for Sun-Earth
+
+    out : numpy.array(double)
+        Array receiving extraterrestrial radiation
+    """
+
+    with radprof.Stage("radest.clamp", out.size):
+
+        # Solar time angle at beginning and end of averaging period
+        np.subtract(omega, half_period, out=omega1)
+        np.add(omega, half_period, out=omega2)
+
+        # Adjust angular end points to exclude nighttime hours (comparisons
+        # with a NaN sunset angle, on polar days and nights, leave them as are)
+        for angle in (omega1, omega2):
+            np.negative(angle, out=angle)
+            np.greater(angle, omegaS, out=mask)
+            np.copyto(angle, omegaS, where=mask)
+            np.negative(angle, out=angle)
+        for angle in (omega1, omega2):
+            np.greater(angle, omegaS, out=mask)
+            np.copyto(angle, omegaS, where=mask)
+        np.greater(omega1, omega2, out=mask)
+        np.copyto(omega1, omega2, where=mask)
+
+    with radprof.Stage("radest.trig", out.size):
+
+        # Compute extraterrestrial radiation
+        np.subtract(omega2, omega1, out=omega)
+        np.multiply(omega, sin_lat, out=omega)
+        np.multiply(omega, sin_decl, out=omega)
+        np.sin(omega2, out=omega2)
+        np.sin(omega1, out=omega1)
+        np.subtract(omega2, omega1, out=omega2)
+        np.multiply(cos_lat, cos_decl, out=omega1)
+        np.multiply(omega1, omega2, out=omega1)
+        np.add(omega, omega1, out=omega)
+        np.multiply(12.0 / np.pi * SOLAR_CONSTANT, dr, out=out)
+        np.multiply(out, omega, out=out)
+
+        # Zero-limit
+        np.less(out, 0., out=mask)
+        np.copyto(out, 0., where=mask)
+
+
+def _numexpr_kernel(omega, half_period, omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr, out, omega1, omega2, mask):
+    """_ra_kernel, evaluated by numexpr in cache-sized blocks, with few passes over memory"""
+
+    import numexpr
+
+    local = {
+        "omega": omega, "half_period": out.dtype.type(half_period), "omegaS": omegaS,
+        "sin_lat": sin_lat, "cos_lat": cos_lat, "sin_decl": sin_decl, "cos_decl": cos_decl,
+        "dr": dr, "c": out.dtype.type(12.0 / np.pi * SOLAR_CONSTANT),
+        "omega1": omega1, "omega2": omega2,
+    }
+
+    # Solar time angles at the ends of averaging period, clamped to daytime
+    numexpr.evaluate("where(half_period - omega > omegaS, -omegaS, omega - half_period)", local_dict=local, out=omega1)
+    numexpr.evaluate("where(omega1 > omegaS, omegaS, omega1)", local_dict=local, out=omega1)
+    numexpr.evaluate("where(-(omega + half_period) > omegaS, -omegaS, omega + half_period)", local_dict=local, out=omega2)
+    numexpr.evaluate("where(omega2 > omegaS, omegaS, omega2)", local_dict=local, out=omega2)
+    numexpr.evaluate("where(omega1 > omega2, omega2, omega1)", local_dict=local, out=omega1)
+
+    # Extraterrestrial radiation, zero-limited
+    numexpr.evaluate(
+        "c * dr * ((omega2 - omega1) * sin_lat * sin_decl + cos_lat * cos_decl * (sin(omega2) - sin(omega1)))",
+        local_dict=local, out=omega
     )
+    numexpr.evaluate("where(omega < 0, 0, omega)", local_dict={"omega": omega}, out=out)
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_kernel():
+    """Builds _ra_kernel as a fused loop, compiled by numba: each sample is
+    read, clamped and evaluated in a single pass"""
+
+    import numba
+
+    @numba.njit(cache=True, nogil=True)
+    def loop(omega, half_period, omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr, out, c):
+        for i in range(out.shape[0]):
+            for j in range(out.shape[1]):
+                oS = omegaS[i, j]
+                o1 = omega[i, j] - half_period
+                o2 = omega[i, j] + half_period
+                if -o1 > oS:
+                    o1 = -oS
+                if -o2 > oS:
+                    o2 = -oS
+                if o1 > oS:
+                    o1 = oS
+                if o2 > oS:
+                    o2 = oS
+                if o1 > o2:
+                    o1 = o2
+                ra = c * dr[i, j] * ((o2 - o1) * sin_lat[i, j] * sin_decl[i, j]
+                                     + cos_lat[i, j] * cos_decl[i, j] * (np.sin(o2) - np.sin(o1)))
+                out[i, j] = 0. if ra < 0. else ra
+
+    def kernel(omega, half_period, omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr, out, omega1, omega2, mask):
+        shape = (1,) * (2 - out.ndim) + out.shape
+        args  = [
+            np.broadcast_to(np.asarray(a, dtype=out.dtype), out.shape).reshape(shape)
+            for a in (omega, omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr)
+        ]
+        omega, omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr = args
+        loop(omega, out.dtype.type(half_period), omegaS, sin_lat, cos_lat, sin_decl, cos_decl, dr,
+             out.reshape(shape), out.dtype.type(12.0 / np.pi * SOLAR_CONSTANT))
+
+    return kernel
+
+
+def _load_numexpr():
+    import numexpr
+    return _numexpr_kernel
+
+
+# Compute backends of ExtraterrestrialRadiation: name -> function
+# returning the kernel, raising ImportError if unavailable
+BACKENDS = {
+    "numpy":   lambda: _ra_kernel,
+    "numexpr": _load_numexpr,
+    "numba":   _numba_kernel,
+}
+
+_backend = "numpy"
+_kernel  = _ra_kernel
+
+
+def SetBackend(name):
+    """Selects the compute backend of ExtraterrestrialRadiation
+
+    Parameters
+    ----------
+
+    name : str
+        One of BACKENDS: "numpy" (default, in-place NumPy expressions),
+        "numexpr" (blocked evaluation by numexpr) or "numba" (fused
+        loop compiled by numba); if the package needed is not installed,
+        "numpy" is used instead
+
+    Returns
+    -------
+
+    str
+        Name of the backend actually selected
+    """
+
+    global _backend, _kernel
+    if name not in BACKENDS:
+        raise ValueError("Unknown backend '%s', expected one of %s" % (name, ", ".join(BACKENDS)))
+    try:
+        _kernel  = BACKENDS[name]()
+        _backend = name
+    except ImportError:
+        _kernel  = _ra_kernel
+        _backend = "numpy"
+    return _backend
+
+
+def GetBackend():
+    """Returns the name of the compute backend in use"""
+
+    return _backend
+
+
+if os.environ.get("RADEST_BACKEND"):
+    SetBackend(os.environ["RADEST_BACKEND"])
 
-    # Zero-limit
-    ra = np.where(ra < 0., 0., ra)
 
-    return ra
+def AvailableBackends():
+    """Returns the names of the backends whose packages are installed"""
 
+    available = []
+    for name, load in BACKENDS.items():
+        try:
+            load()
+            available.append(name)
+        except ImportError:
+            pass
+    return available
 
-def GlobalRadiation(ra, z):
+
+def ExtraterrestrialRadiation(time_stamp, averaging_period, lat, lon, zone, out=None, dtype=np.float64, workspace=None,
+                              workers=None):
+    """Estimates extraterrestrial solar radiation by ASCE method
+
+    Parameters
+    ----------
+
+    timeStamp : numpy.array(numpy.datetime64) or RegularGrid
+        Anticipated time stamp of period to get radiation at; a
+        RegularGrid is never materialized, its days and times of
+        day being obtained by integer arithmetic
+
+    averagingPeriod : int
+        Length of period (s)
+
+    lat : double or numpy.array(double)
+        Local latitude(degrees, positive northwards)
+
+    lon : double or numpy.array(double)
+        Local longitude(degrees, positive eastwards)
+
+    zone : int or numpy.array(int)
+        Time zone number(hours, positive Eastwards, in range - 12 to 12);
+        either a site parameter, or an offset per time stamp, e.g. for
+        local civil times switching with daylight saving time: a matrix
+        of shape (stations x time stamps) or (1 x time stamps); a vector
+        is always one zone per station
+
+    out : numpy.array(double)
+        Array receiving the result, of the same shape as the return
+        value; if given, its type overrides dtype
+
+    dtype : numpy.dtype
+        Type of the result and of all intermediate computations.
+        With numpy.float32 memory traffic halves; the error with
+        respect to float64, relative to the largest value of the
+        series, is about 1e-6 for hourly periods, 3e-6 for 10 minutes
+        and 3e-5 for 1 minute, growing to about 1e-3 for 1 s periods,
+        where the difference of sines at the period ends loses precision
+
+    workspace : Workspace
+        Scratch buffers to reuse across calls
+
+    workers : int
+        Number of threads sharing the computation (default: as set by
+        SetWorkers); the result does not depend on it
+
+    Returns
+    -------
+
+    numpy.array(double)
+        Vector containing extraterrestrial radiation (W/m2), or, if any
+        of lat, lon and zone is a station vector, or zone is a matrix,
+        matrix of shape (stations x time stamps)
+
+    Notes
+    -----
+
+    The time axis is processed in blocks of about BLOCK_SIZE elements,
+    in place, so that besides the result only a handful of block-sized
+    scratch buffers are allocated. With several workers, each thread
+    processes a contiguous run of blocks into the shared result, with
+    scratch buffers of its own; as every element is computed by the same
+    operations, the result is identical to the serial one.
+    """
+
+    return _solar_pass(time_stamp, averaging_period, lat, lon, zone, ("Ra",), None, out, dtype, workspace, workers)["Ra"]
+
+
+# Quantities computed by SolarGeometry
+GEOMETRY_QUANTITIES = ("Ra", "Rg", "omegaS", "sunrise", "sunset", "day_length", "elevation")
+
+
+def _geometry_block(results, w, hours, half_step, omegaS, sin_lat, cos_lat, sin_decl, cos_decl):
+    """Solar geometry of one block, from the terms of the radiation computation
+
+    results maps quantity names to the blocks receiving them; w is the
+    solar time angle at mid of averaging period (rad), and hours the
+    time of day of time stamps (h).
+    """
+
+    if "omegaS" in results:
+        np.copyto(results["omegaS"], omegaS)
+    if "day_length" in results:
+        polar = np.where(sin_lat * sin_decl > 0.0, np.pi, 0.0)
+        np.multiply(np.where(np.isnan(omegaS), polar, omegaS), 24.0 * 3600.0 / np.pi, out=results["day_length"])
+    if "sunrise" in results or "sunset" in results:
+        noon     = hours + half_step - w * (12.0 / np.pi)
+        half_day = omegaS * (12.0 / np.pi)
+        if "sunrise" in results:
+            np.multiply(noon - half_day, 3600.0, out=results["sunrise"])
+        if "sunset" in results:
+            np.multiply(noon + half_day, 3600.0, out=results["sunset"])
+    if "elevation" in results:
+        sin_elevation = sin_lat * sin_decl + cos_lat * cos_decl * np.cos(w)
+        np.degrees(np.arcsin(np.clip(sin_elevation, -1.0, 1.0)), out=results["elevation"])
+
+
+def _solar_pass(time_stamp, averaging_period, lat, lon, zone, quantities, z, out, dtype, workspace, workers):
+    """Computes the desired quantities of SolarGeometry in a single pass over time stamps
+
+    out, if given, receives the first quantity. Parameters are otherwise
+    as in SolarGeometry; the result is a dictionary of arrays.
+    """
+
+    # Site parameters, as scalars or station columns; a zone aligned with
+    # the time axis is applied block by block
+    grid      = isinstance(time_stamp, RegularGrid)
+    num_times = len(time_stamp)
+    time_zone = _time_zone(zone, num_times)
+    if time_zone is None:
+        lat, lon, zone = _site_parameters(lat, lon, zone)
+    else:
+        lat, lon, _ = _site_parameters(lat, lon, np.zeros(time_zone.shape[0]))
+
+    # Results
+    shape = np.broadcast_shapes(lat.shape, (num_times,), time_zone.shape if time_zone is not None else ())
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError("out has shape %s, expected %s" % (out.shape, shape))
+    dtype   = out.dtype
+    results = {name: out if name == quantities[0] else np.empty(shape, dtype=dtype) for name in quantities}
+    if workspace is None:
+        workspace = Workspace()
+
+    # Radiation is computed into Ra, or else into Rg, reduced in place
+    radiation = "Ra" if "Ra" in results else "Rg" if "Rg" in results else None
+    if "Rg" in results:
+        if z is None:
+            raise ValueError("Height z is required for Rg")
+        z = np.asarray(z, dtype=float)
+        if z.ndim == 1 and len(shape) == 2:
+            z = z[:, np.newaxis]
+        factor = (0.75 + 2.0e-5*z).astype(dtype)
+    geometry = [name for name in results if name not in ("Ra", "Rg")]
+
+    # Site-dependent terms, once per station
+    sin_lat   = np.sin(lat * np.pi / 180.0).astype(dtype)
+    cos_lat   = np.cos(lat * np.pi / 180.0).astype(dtype)
+    if time_zone is None:
+        lon_term = (0.06667 * _delta_lon(lon, zone)).astype(dtype)
+        zone     = zone.astype(dtype)
+    else:
+        zone_breaks = _zone_breaks(time_zone)
+
+    # Constants
+    t1 = averaging_period / 3600.0
+    half_period = np.pi * t1 / 24.0
+
+    # Day-level terms (declination, Sun-Earth distance factor, seasonal
+    # correction for solar time, sunset angle), once per day and latitude;
+    # dense series share a single table, sparse ones get one per block
+    dense = False
+    if num_times > 0 and grid:
+        first_day = time_stamp.epoch // 86400
+        num_days  = (time_stamp.epoch + time_stamp.step * (num_times - 1)) // 86400 - first_day + 1
+        dense     = num_days <= num_times
+    elif num_times > 0:
+        first_day = int(time_stamp.min().astype('datetime64[D]').astype(np.int64))
+        num_days  = int(time_stamp.max().astype('datetime64[D]').astype(np.int64)) - first_day + 1
+        dense     = num_days <= num_times
+    if dense:
+        with radprof.Stage("radest.day_table", num_days * lat.size):
+            table = [term.astype(dtype) for term in _dense_day_table(first_day, num_days, lat)]
+
+    # Process the time axis block by block
+    num_stations = shape[0] if len(shape) == 2 else 1
+    block        = max(1, BLOCK_SIZE // num_stations)
+
+    def run(i_first, i_last, workspace):
+        for first in range(i_first, i_last, block):
+            last           = min(first + block, i_last)
+            out_block      = out[..., first:last]
+            hours          = workspace.get("hours", (last - first,), dtype)
+            v              = workspace.get("v", (last - first,), dtype)
+            sin_decl_block = workspace.get("sin_decl", (last - first,), dtype)
+            cos_decl_block = workspace.get("cos_decl", (last - first,), dtype)
+            w              = workspace.get("w", out_block.shape, dtype)
+            omegaS_block   = workspace.get("omegaS", out_block.shape, dtype)
+            omega1         = workspace.get("omega1", out_block.shape, dtype)
+            omega2         = workspace.get("omega2", out_block.shape, dtype)
+            mask           = workspace.get("mask", out_block.shape, bool)
+
+            # Days since epoch, and hours since start of day
+            with radprof.Stage("radest.day_start", last - first):
+                if grid:
+                    days    = workspace.get("days", (last - first,), np.int64)
+                    seconds = workspace.get("seconds", (last - first,), np.int64)
+                    np.multiply(np.arange(first, last, dtype=np.int64), time_stamp.step, out=seconds)
+                    np.add(seconds, time_stamp.epoch, out=seconds)
+                    np.divmod(seconds, 86400, out=(days, seconds))
+                    np.divide(seconds, 3600.0, out=v)
+                else:
+                    days, hours = _epoch_days(time_stamp[first:last], 3600)
+                    np.copyto(v, hours)
+                if geometry:
+                    np.copyto(hours, v)
+
+                if dense:
+                    day_index = np.subtract(days, first_day, out=days)
+                    dr, Sc, sin_decl, cos_decl, omegaS = table
+                else:
+                    day_index, block_table = _day_terms(days.astype('datetime64[D]'), lat, cache=False)
+                    dr, Sc, sin_decl, cos_decl, omegaS = [term.astype(dtype) for term in block_table]
+
+            # Compute hour at mid of averaging time
+            with radprof.Stage("radest.solar_angle", out_block.size):
+                if time_zone is None:
+                    runs = [(0, last - first, zone, lon_term)]
+                else:
+                    runs = _zone_runs(time_zone, zone_breaks, first, last, lon, dtype)
+                for a, b, zone_run, lon_term_run in runs:
+                    w_run = w[..., a:b]
+                    np.subtract(v[a:b], zone_run, out=w_run)
+                    np.add(w_run, zone_run, out=w_run)
+                    np.add(w_run, 0.5 * t1, out=w_run)
+
+                    # Solar time angle at midpoint of averaging time
+                    np.add(w_run, lon_term_run, out=w_run)
+
+                np.take(Sc, day_index, out=v, mode='clip')
+                np.add(w, v, out=w)
+                np.subtract(w, 12.0, out=w)
+                np.multiply(w, np.pi / 12.0, out=w)
+
+                # Day-level terms of each time stamp
+                np.take(omegaS, day_index, axis=-1, out=omegaS_block, mode='clip')
+                np.take(sin_decl, day_index, out=sin_decl_block, mode='clip')
+                np.take(cos_decl, day_index, out=cos_decl_block, mode='clip')
+                np.take(dr, day_index, out=v, mode='clip')
+
+            # Solar geometry, from the same angles
+            if geometry:
+                with radprof.Stage("radest.geometry", out_block.size * len(geometry)):
+                    _geometry_block({name: results[name][..., first:last] for name in geometry},
+                                    w, hours, 0.5 * t1, omegaS_block, sin_lat, cos_lat, sin_decl_block, cos_decl_block)
+
+            if radiation is None:
+                continue
+            out_block = results[radiation][..., first:last]
+            if _kernel is _ra_kernel:
+                _ra_kernel(w, half_period, omegaS_block, sin_lat, cos_lat, sin_decl_block, cos_decl_block, v,
+                           out_block, omega1, omega2, mask)
+            else:
+                with radprof.Stage("radest.%s" % _backend, out_block.size):
+                    _kernel(w, half_period, omegaS_block, sin_lat, cos_lat, sin_decl_block, cos_decl_block, v,
+                            out_block, omega1, omega2, mask)
+            if "Rg" in results:
+                with radprof.Stage("radest.GlobalRadiation", out_block.size):
+                    if radiation == "Ra":
+                        np.multiply(out_block, factor, out=results["Rg"][..., first:last])
+                    else:
+                        np.multiply(out_block, factor, out=out_block)
+
+    _run_split(run, _split(num_times, num_stations, block, workers), workspace)
+
+    return results
+
+
+def GlobalRadiation(ra, z, out=None, workers=None):
     """Reduce extraterrestrial radiation to in-atmosphere value
 
     Parameters
@@ -212,8 +1078,16 @@ def GlobalRadiation(ra, z):
     ra : numpy.array(double)
         Estimate of extraterrestrial radiation (W/m2)
 
-    z : double
-        Height above mean sea level (m)
+    z : double or numpy.array(double)
+        Height above mean sea level (m); a station vector applies row-wise
+        to a (stations x time stamps) matrix of extraterrestrial radiation
+
+    out : numpy.array(double)
+        Array receiving the result; may be ra itself, to reduce in place
+
+    workers : int
+        Number of threads sharing the computation (default: as set by
+        SetWorkers)
 
     Returns
     -------
@@ -222,11 +1096,377 @@ def GlobalRadiation(ra, z):
         Estimate of global solar radiation (W/m2)
     """
 
-    rg = ra * (0.75 + 2.0e-5*z)
+    ra = np.asarray(ra)
+    z  = np.asarray(z, dtype=float)
+    if z.ndim == 1 and ra.ndim == 2:
+        z = z[:, np.newaxis]
+    factor = 0.75 + 2.0e-5*z
+    if np.issubdtype(ra.dtype, np.floating):
+        factor = factor.astype(ra.dtype)
+    num_times    = ra.shape[-1] if ra.ndim > 0 else 1
+    num_stations = ra.size // num_times if num_times > 0 else 1
+    bounds       = _split(num_times, num_stations, max(1, BLOCK_SIZE // num_stations), workers)
+    if ra.ndim == 0 or len(bounds) == 2 or (factor.ndim > 0 and factor.shape[-1] != 1):
+        with radprof.Stage("radest.GlobalRadiation", ra.size):
+            rg = np.multiply(ra, factor, out=out)
+        return rg
+
+    # Split over threads, along the time axis
+    rg = out if out is not None else np.empty(np.broadcast_shapes(ra.shape, factor.shape), np.result_type(ra, factor))
+
+    def run(first, last, workspace):
+        with radprof.Stage("radest.GlobalRadiation", ra[..., first:last].size):
+            np.multiply(ra[..., first:last], factor, out=rg[..., first:last])
+
+    _run_split(run, bounds, Workspace())
 
     return rg
 
 
+def SolarGeometry(time_stamp, averaging_period, lat, lon, zone, z=None, quantities=GEOMETRY_QUANTITIES,
+                  dtype=np.float64, workspace=None, workers=None):
+    """Computes radiation and solar geometry together, in a single pass
+
+    The solar time angle, sunset angle and declination computed for
+    extraterrestrial radiation are used for all the other quantities,
+    and quantities not requested are not computed.
+
+    Parameters
+    ----------
+
+    time_stamp, averaging_period, lat, lon, zone, dtype, workspace, workers
+        As in ExtraterrestrialRadiation
+
+    z : double or numpy.array(double)
+        Height above mean sea level (m); needed for "Rg" only
+
+    quantities : sequence(str)
+        Quantities to compute, among GEOMETRY_QUANTITIES:
+
+        "Ra"          extraterrestrial radiation (W/m2)
+        "Rg"          global radiation (W/m2), as from GlobalRadiation
+        "omegaS"      sunset hour angle (rad; NaN on polar days and nights)
+        "sunrise"     sunrise time (s since local midnight; NaN on polar days and nights)
+        "sunset"      sunset time (s since local midnight; NaN on polar days and nights)
+        "day_length"  time from sunrise to sunset (s; 86400 on polar days, 0 on polar nights)
+        "elevation"   solar elevation at mid of averaging period (degrees)
+
+    Returns
+    -------
+
+    dict(str, numpy.array(double))
+        Requested quantities, each shaped as the result of
+        ExtraterrestrialRadiation. Ra and Rg are identical to those of
+        ExtraterrestrialRadiation and GlobalRadiation; sunrise and
+        sunset agree with SolarTimes to rounding.
+    """
+
+    quantities = tuple(quantities)
+    unknown    = [name for name in quantities if name not in GEOMETRY_QUANTITIES]
+    if unknown or not quantities:
+        raise ValueError("Unknown quantities %s; expected some of %s" % (unknown, ", ".join(GEOMETRY_QUANTITIES)))
+    return _solar_pass(time_stamp, averaging_period, lat, lon, zone, quantities, z, None, dtype, workspace, workers)
+
+
+def SolarTimes(days, lat, lon, zone):
+    """Computes solar noon, sunrise and sunset in closed form
+
+    The solar time angle of ExtraterrestrialRadiation vanishes when
+    t + 0.06667 * delta_lon + Sc = 12, and equals -omegaS and +omegaS at
+    sunrise and sunset, so no search over the day is necessary.
+
+    Parameters
+    ----------
+
+    days : numpy.array(numpy.datetime64)
+        Days to process (any time part is ignored)
+
+    lat : double or numpy.array(double)
+        Local latitude(degrees, positive northwards)
+
+    lon : double or numpy.array(double)
+        Local longitude(degrees, positive eastwards)
+
+    zone : int or numpy.array(int)
+        Time zone number(hours, positive Eastwards, in range - 12 to 12)
+
+    Returns
+    -------
+
+    (numpy.array(double), numpy.array(double), numpy.array(double))
+        Offset of solar noon from 12:00 local standard time (s, the
+        equation of time including the longitude correction), and
+        sunrise and sunset times (s since local midnight; NaN on polar
+        days and nights); vectors, or (stations x days) matrices if any
+        of lat, lon and zone is a station vector
+    """
+
+    # Site parameters, as scalars or station columns
+    lat, lon, zone = _site_parameters(lat, lon, zone)
+
+    with radprof.Stage("radest.SolarTimes", np.size(days) * lat.size):
+
+        # Day-level terms
+        day_start = np.asarray(days).astype('datetime64[D]')
+        day_index, (dr, Sc, sin_decl, cos_decl, omegaS) = _day_terms(day_start, lat)
+        Sc     = Sc[day_index]
+        omegaS = np.take(omegaS, day_index, axis=-1)
+
+        # Solar noon, and half day length, in hours
+        noon      = 12.0 - 0.06667 * _delta_lon(lon, zone) - Sc
+        half_day  = omegaS * 12.0 / np.pi
+
+    return 3600.0 * (noon - 12.0), 3600.0 * (noon - half_day), 3600.0 * (noon + half_day)
+
+
+def ExtraterrestrialRadiationTotals(periods, lat):
+    """Integrates extraterrestrial radiation over days, months or years, in closed form
+
+    Each day is integrated analytically between sunrise and sunset
+    (solar time angles -omegaS and omegaS), which is what the sum of the
+    sub-daily values of ExtraterrestrialRadiation over the day tends to,
+    for any averaging period dividing the day, as long as the whole
+    daylight period falls within the civil day (i.e. the site is within
+    a few hours of its zone's meridian). The agreement with such sums
+    is to about 1e-13 of the largest daily value; polar days and nights
+    are integrated as a full turn and as nothing, respectively.
+
+    Parameters
+    ----------
+
+    periods : numpy.array(numpy.datetime64)
+        Periods to integrate over: days, months or years, according to
+        the unit of the array ('D', 'M' or 'Y')
+
+    lat : double or numpy.array(double)
+        Local latitude(degrees, positive northwards)
+
+    Returns
+    -------
+
+    numpy.array(double)
+        Energy received on each period (Wh/m2, i.e. the sum of the
+        hourly values of ExtraterrestrialRadiation); vector, or
+        (stations x periods) matrix if lat is a station vector. The
+        corresponding global radiation is obtained by GlobalRadiation.
+    """
+
+    periods = np.asarray(periods)
+    unit = np.datetime_data(periods.dtype)[0] if np.issubdtype(periods.dtype, np.datetime64) else None
+    if unit not in ('D', 'M', 'Y'):
+        raise ValueError("periods must be a datetime64 array in 'D', 'M' or 'Y' units")
+    lat, = _site_parameters(lat)
+    if periods.size == 0:
+        return np.zeros(np.broadcast_shapes(lat.shape, periods.shape))
+
+    # Day boundaries of each period
+    start = periods.astype('datetime64[D]').astype(np.int64)
+    end   = (periods + 1).astype('datetime64[D]').astype(np.int64)
+    first_day = int(start.min())
+    num_days  = int(end.max()) - first_day
+
+    # Daily integrals, from sunrise to sunset
+    dr, Sc, sin_decl, cos_decl, omegaS = _dense_day_table(first_day, num_days, lat)
+    sin_lat = np.sin(lat * np.pi / 180.0)
+    cos_lat = np.cos(lat * np.pi / 180.0)
+    omegaS  = np.where(np.isnan(omegaS), np.where(sin_lat * sin_decl > 0.0, np.pi, 0.0), omegaS)
+    daily   = 24.0 / np.pi * SOLAR_CONSTANT * dr * (
+        omegaS * sin_lat * sin_decl + cos_lat * cos_decl * np.sin(omegaS)
+    )
+
+    # Sums over periods
+    cumulated = np.concatenate([np.zeros(daily.shape[:-1] + (1,)), np.cumsum(daily, axis=-1)], axis=-1)
+    return cumulated[..., end - first_day] - cumulated[..., start - first_day]
+
+
+def GlobalRadiationChunks(first, delta, n, lat, lon, zone, z, chunk_size=86400):
+    """Generates a regularly spaced series of global radiation estimates, in chunks
+
+    Parameters
+    ----------
+
+    first : numpy.datetime64
+        Time stamp of the first period
+
+    delta : int
+        Time step, used also as averaging period (s)
+
+    n : int or None
+        Number of time steps; if None, the series never ends
+
+    lat : double or numpy.array(double)
+        Local latitude(degrees, positive northwards)
+
+    lon : double or numpy.array(double)
+        Local longitude(degrees, positive eastwards)
+
+    zone : int or numpy.array(int)
+        Time zone number(hours, positive Eastwards, in range - 12 to 12)
+
+    z : double or numpy.array(double)
+        Height above mean sea level (m)
+
+    chunk_size : int
+        Maximum number of time steps in each chunk
+
+    Yields
+    ------
+
+    (numpy.array(numpy.datetime64), numpy.array(double))
+        Time stamps of the chunk, and the corresponding global radiation
+        estimates (W/m2), as a vector or (stations x time stamps) matrix
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    first = np.datetime64(first, 's')
+    step  = np.timedelta64(int(delta), 's')
+
+    i = 0
+    while n is None or i < n:
+        m = chunk_size if n is None else min(chunk_size, n - i)
+        grid = RegularGrid(first + i * step, delta, m)
+        tm = grid.time_stamps()
+        ra = ExtraterrestrialRadiation(grid, delta, lat, lon, zone)
+        yield tm, GlobalRadiation(ra, z, out=ra)
+        i += m
+
+
+class RadiationEstimator:
+    """Incremental estimator of radiation, for live feeds from a set of stations
+
+    The site-dependent terms are computed once, and the day-level terms
+    (declination, Sun-Earth distance factor, seasonal correction for
+    solar time, sunset angle) once per station and day, being refreshed
+    only when a station's samples move to another day; each call of
+    estimate() then costs a few vector operations over its samples.
+    Results are identical to those of ExtraterrestrialRadiation and
+    GlobalRadiation.
+
+    Parameters
+    ----------
+
+    averaging_period : int
+        Length of period (s)
+
+    lat : double or numpy.array(double)
+        Local latitude(degrees, positive northwards)
+
+    lon : double or numpy.array(double)
+        Local longitude(degrees, positive eastwards)
+
+    zone : int or numpy.array(int)
+        Time zone number(hours, positive Eastwards, in range - 12 to 12)
+
+    z : double or numpy.array(double)
+        Height above mean sea level (m)
+
+    dtype : numpy.dtype
+        Type of results, as in ExtraterrestrialRadiation
+    """
+
+    def __init__(self, averaging_period, lat, lon, zone, z=0.0, dtype=np.float64):
+        lat, lon, zone, z = [np.atleast_1d(v) for v in np.broadcast_arrays(
+            *[np.asarray(v, dtype=float) for v in (lat, lon, zone, z)]
+        )]
+        if lat.ndim > 1:
+            raise ValueError("Site parameters must be scalars or 1-D station vectors")
+        self.dtype        = np.dtype(dtype)
+        self.num_stations = len(lat)
+        self.lat          = lat
+        self.lon          = lon
+        self.t1           = averaging_period / 3600.0
+        self.half_period  = np.pi * self.t1 / 24.0
+        self.sin_lat      = np.sin(lat * np.pi / 180.0).astype(self.dtype)
+        self.cos_lat      = np.cos(lat * np.pi / 180.0).astype(self.dtype)
+        self.zone         = zone.astype(self.dtype)
+        self.lon_term     = (0.06667 * _delta_lon(lon, zone)).astype(self.dtype)
+        self.factor       = (0.75 + 2.0e-5*z).astype(self.dtype)
+
+        # Day-level terms of the last day seen by each station
+        self.day       = np.full(self.num_stations, np.iinfo(np.int64).min, dtype=np.int64)
+        self.terms     = [np.zeros(self.num_stations, dtype=self.dtype) for i in range(5)]
+        self.refreshes = 0
+        self.workspace = Workspace()
+
+    def estimate(self, time_stamp, stations=None, zone=None):
+        """Estimates radiation at new time stamps
+
+        Parameters
+        ----------
+
+        time_stamp : numpy.array(numpy.datetime64)
+            Anticipated time stamps of periods to get radiation at
+
+        stations : numpy.array(int)
+            Index of the station of each time stamp; if None, time
+            stamps are all of the only station, or one per station, in
+            order
+
+        zone : numpy.array(double)
+            Time zone of each time stamp, overriding that of its station
+            (e.g. after a daylight saving time switch)
+
+        Returns
+        -------
+
+        (numpy.array(double), numpy.array(double))
+            Extraterrestrial and global radiation (W/m2), one value per
+            time stamp
+        """
+
+        time_stamp = np.atleast_1d(np.asarray(time_stamp))
+        n = len(time_stamp)
+        if stations is None:
+            if self.num_stations == 1:
+                stations = np.zeros(n, dtype=np.intp)
+            elif n == self.num_stations:
+                stations = np.arange(n)
+            else:
+                raise ValueError("Expected one time stamp per station (%d), got %d" % (self.num_stations, n))
+        stations = np.asarray(stations, dtype=np.intp)
+
+        # Days, and hours since start of day
+        days, hours = _epoch_days(time_stamp, 3600)
+        v = hours.astype(self.dtype)
+
+        # Day-level terms, refreshed for the stations which changed day
+        terms = [term[stations] for term in self.terms]
+        stale = np.flatnonzero(days != self.day[stations])
+        if len(stale) > 0:
+            fresh = _day_table(days[stale].astype('datetime64[D]'), self.lat[stations[stale]])
+            for term, fresh_term, state in zip(terms, fresh, self.terms):
+                term[stale]  = fresh_term
+                state[stations[stale]] = fresh_term
+            self.day[stations[stale]] = days[stale]
+            self.refreshes += len(stale)
+        dr, Sc, sin_decl, cos_decl, omegaS = terms
+
+        # Solar time angle at midpoint of averaging time
+        if zone is None:
+            zone     = self.zone[stations]
+            lon_term = self.lon_term[stations]
+        else:
+            zone     = np.broadcast_to(np.asarray(zone, dtype=float), (n,))
+            lon_term = (0.06667 * _delta_lon(self.lon[stations], zone)).astype(self.dtype)
+            zone     = zone.astype(self.dtype)
+        w = np.subtract(v, zone)
+        np.add(w, zone, out=w)
+        np.add(w, 0.5 * self.t1, out=w)
+        np.add(w, lon_term, out=w)
+        np.add(w, Sc, out=w)
+        np.subtract(w, 12.0, out=w)
+        np.multiply(w, np.pi / 12.0, out=w)
+
+        # Extraterrestrial and global radiation
+        ra = np.empty(n, dtype=self.dtype)
+        _kernel(w, self.half_period, omegaS, self.sin_lat[stations], self.cos_lat[stations], sin_decl, cos_decl, dr,
+                ra, self.workspace.get("omega1", (n,), self.dtype), self.workspace.get("omega2", (n,), self.dtype),
+                self.workspace.get("mask", (n,), bool))
+        rg = np.multiply(ra, self.factor[stations])
+        return ra, rg
+
+
 if __name__ == "__main__":
 
     # Test 1: DoY
@@ -2,18 +2,26 @@
 
 import numpy as np
 import radest
+import radout
+import radprof
 import os
 import sys
 
 if __name__ == "__main__":
 
     # Get parameters
-    if len(sys.argv) != 9:
+    args = sys.argv[1:]
+    fmt  = "csv"
+    if "--format" in args:
+        i    = args.index("--format")
+        fmt  = args[i+1] if i+1 < len(args) else ""
+        args = args[:i] + args[i+2:]
+    if len(args) != 8 or fmt not in radout.FORMATS:
         print("radlist - Program generating a time series of global radiation estimates")
         print()
         print("Usage:")
         print()
-        print("  ./radlist.py <Lat> <Lon> <Fuse> <Height> <Initial_ISO_DateTime> <Delta_Time> <Num_Steps> <Out_File>")
+        print("  ./radlist.py [--format <Format>] <Lat> <Lon> <Fuse> <Height> <Initial_ISO_DateTime> <Delta_Time> <Num_Steps> <Out_File>")
         print()
         print("where")
         print()
@@ -25,30 +33,27 @@ if __name__ == "__main__":
         print("  <Delta_Time> is the (intgeer!) time step (s)")
         print("  <Num_Steps> is the number of time steps (greater than 0)")
         print("  <Out_File> is the output file name")
+        print("  <Format> is one of")
+        print("      csv (default), comma-separated text")
+        print("      npy, a memory-mappable record array of int64 epoch seconds and float32 Rg")
+        print("      bin, the append-friendly chunked binary format read by radout.ReadBin")
         print()
         print("Copyright 2019 by Mauri Favaron")
         print("This is open-source code, covered by the MIT license")
         print()
         sys.exit(1)
-    lat   = float(sys.argv[1])
-    lon   = float(sys.argv[2])
-    fuse  = int(sys.argv[3])
-    z     = float(sys.argv[4])
-    first = np.datetime64(sys.argv[5], 's')
-    delta = int(sys.argv[6])
-    n     = int(sys.argv[7])
-    out   = sys.argv[8]
+    lat   = float(args[0])
+    lon   = float(args[1])
+    fuse  = int(args[2])
+    z     = float(args[3])
+    first = np.datetime64(args[4], 's')
+    delta = int(args[5])
+    n     = int(args[6])
+    out   = args[7]
 
-    # Generate the time sequence corresponding to the desired time range
-    tm = np.array([first + np.timedelta64(i*delta, 's') for i in range(n)])
-
-    # Estimate global radiation
-    ra = radest.ExtraterrestrialRadiation(tm,delta, lat, lon, fuse)
-    rg = radest.GlobalRadiation(ra, z)
-
-    # Print results
-    f = open(out, "w")
-    f.write("date, Rg\n")
-    for i in range(len(tm)):
-        f.write("%s, %f\n" % (str(tm[i]), rg[i]))
-    f.close()
+    # Estimate global radiation, chunk by chunk, and print results
+    with radprof.Stage("radlist", n):
+        f = radout.OpenWriter(out, ["date", "Rg"], fmt, n=n)
+        for tm, rg in radest.GlobalRadiationChunks(first, delta, n, lat, lon, fuse, z):
+            f.write(tm, rg)
+        f.close()
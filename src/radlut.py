@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import radest
+import json
+import sys
+
+
+# Reference leap year, whose days give day-of-year 1 to 366
+_LEAP_YEAR_START = np.datetime64('2020-01-01', 'D')
+
+# Number of queries interpolated per block
+QUERY_BLOCK_SIZE = 1 << 20
+
+
+def _solar_angle(solar_hour):
+    """Solar time angle (rad) from solar hour (12 at solar noon)"""
+
+    return (np.pi / 12.0) * (np.asarray(solar_hour, dtype=float) - 12.0)
+
+
+def ExactRa(lat, doy, solar_hour, averaging_period):
+    """Extraterrestrial radiation at given latitude, day-of-year and solar hour
+
+    This is the exact path the lookup table approximates: the same
+    ASCE formulation as radest.ExtraterrestrialRadiation, with the
+    solar hour (local apparent time at mid of averaging period, i.e.
+    t + 0.06667 * delta_lon + Sc) given directly instead of being
+    derived from time stamps and site position.
+
+    Parameters
+    ----------
+
+    lat : double or numpy.array(double)
+        Latitude (degrees, positive northwards)
+
+    doy : int or numpy.array(int)
+        Day of year (1 to 366)
+
+    solar_hour : double or numpy.array(double)
+        Solar hour at mid of averaging period (hours, 12 at solar noon)
+
+    averaging_period : int
+        Length of period (s)
+
+    Returns
+    -------
+
+    numpy.array(double)
+        Extraterrestrial radiation (W/m2), with the broadcast shape of
+        lat, doy and solar_hour
+    """
+
+    lat, doy, omega = np.broadcast_arrays(
+        np.asarray(lat, dtype=float), np.asarray(doy), _solar_angle(solar_hour)
+    )
+    days  = _LEAP_YEAR_START + (doy.astype(np.int64) - 1)
+    dr, Sc, sin_decl, cos_decl, omegaS = radest._day_table(days, lat)
+    omega = omega.copy()
+    ra    = np.empty(omega.shape)
+    radest._ra_kernel(
+        omega, np.pi * averaging_period / 3600.0 / 24.0, omegaS,
+        np.sin(lat * np.pi / 180.0), np.cos(lat * np.pi / 180.0), sin_decl, cos_decl, dr,
+        ra, np.empty(ra.shape), np.empty(ra.shape), np.empty(ra.shape, dtype=bool)
+    )
+    return ra
+
+
+class RadiationLUT:
+    """Lookup table of extraterrestrial radiation on a (lat, doy, solar hour) grid
+
+    Latitudes span -90 to 90 degrees and solar hours 0 to 24, both
+    evenly; days of year are 1 to 366. Queries are answered by bilinear
+    interpolation in latitude and solar hour, exactly in day-of-year.
+
+    Parameters
+    ----------
+
+    table : numpy.array(double)
+        Table, of shape (latitudes, 366, solar hours), possibly memory-mapped
+
+    averaging_period : int
+        Length of period (s) the table was built for
+    """
+
+    def __init__(self, table, averaging_period):
+        self.table            = table
+        self.averaging_period = int(averaging_period)
+        self.num_lat, self.num_doy, self.num_hour = table.shape
+        self.lat_step  = 180.0 / (self.num_lat - 1)
+        self.hour_step = 24.0 / (self.num_hour - 1)
+
+    def query(self, lat, doy, solar_hour):
+        """Interpolates extraterrestrial radiation
+
+        Parameters
+        ----------
+
+        lat : double or numpy.array(double)
+            Latitude (degrees, positive northwards)
+
+        doy : int or numpy.array(int)
+            Day of year (1 to 366)
+
+        solar_hour : double or numpy.array(double)
+            Solar hour at mid of averaging period (hours, 12 at solar
+            noon); values outside 0 to 24 are wrapped
+
+        Returns
+        -------
+
+        numpy.array(double)
+            Extraterrestrial radiation (W/m2)
+        """
+
+        lat, doy, hour = np.broadcast_arrays(
+            np.asarray(lat, dtype=float), np.asarray(doy), np.asarray(solar_hour, dtype=float)
+        )
+        ra    = np.empty(lat.shape)
+        flat  = self.table.reshape(-1)
+        plane = self.num_doy * self.num_hour
+        lat_r, doy_r, hour_r, ra_r = lat.reshape(-1), doy.reshape(-1), hour.reshape(-1), ra.reshape(-1)
+        for first in range(0, lat_r.size, QUERY_BLOCK_SIZE):
+            last = min(first + QUERY_BLOCK_SIZE, lat_r.size)
+
+            # Cell indices and weights
+            x = (lat_r[first:last] + 90.0) / self.lat_step
+            i = np.clip(np.floor(x).astype(np.int64), 0, self.num_lat - 2)
+            a = x - i
+            y = np.mod(hour_r[first:last], 24.0) / self.hour_step
+            j = np.clip(np.floor(y).astype(np.int64), 0, self.num_hour - 2)
+            b = y - j
+            base = (i * self.num_doy + doy_r[first:last].astype(np.int64) - 1) * self.num_hour + j
+
+            # Bilinear interpolation
+            low  = (1.0 - b) * flat[base]         + b * flat[base + 1]
+            high = (1.0 - b) * flat[base + plane] + b * flat[base + plane + 1]
+            ra_r[first:last] = (1.0 - a) * low + a * high
+        return ra
+
+    def max_error(self, num_samples=1000000, seed=0):
+        """Estimates the largest interpolation error against the exact path
+
+        Parameters
+        ----------
+
+        num_samples : int
+            Number of random (lat, doy, solar hour) points to check
+
+        seed : int
+            Seed of the random generator
+
+        Returns
+        -------
+
+        (double, double)
+            Largest absolute error (W/m2), and the same relative to the
+            largest exact value in the sample
+        """
+
+        rng   = np.random.default_rng(seed)
+        lat   = rng.uniform(-90.0, 90.0, num_samples)
+        doy   = rng.integers(1, self.num_doy + 1, num_samples)
+        hour  = rng.uniform(0.0, 24.0, num_samples)
+        exact = ExactRa(lat, doy, hour, self.averaging_period)
+        error = np.max(np.abs(self.query(lat, doy, hour) - exact))
+        return float(error), float(error / np.max(exact))
+
+
+def BuildLUT(path, averaging_period, num_lat=181, num_hour=1441, dtype=np.float32):
+    """Builds a lookup table, and saves it for memory-mapped use
+
+    The table goes to path (a .npy file), and its description to
+    path + ".json".
+
+    Parameters
+    ----------
+
+    path : str
+        Output file name
+
+    averaging_period : int
+        Length of period (s)
+
+    num_lat : int
+        Number of latitudes between -90 and 90 degrees
+
+    num_hour : int
+        Number of solar hours between 0 and 24
+
+    dtype : numpy.dtype
+        Type of table values
+
+    Returns
+    -------
+
+    RadiationLUT
+        The table, memory-mapped from path
+    """
+
+    lat   = np.linspace(-90.0, 90.0, num_lat)
+    days  = _LEAP_YEAR_START + np.arange(366)
+    omega = _solar_angle(np.linspace(0.0, 24.0, num_hour))
+    dr, Sc, sin_decl, cos_decl, omegaS = radest._day_table(days, lat[:, np.newaxis])
+
+    # One latitude at a time, with days along rows and solar hours along columns
+    table  = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(num_lat, 366, num_hour))
+    shape  = (366, num_hour)
+    row    = np.empty(shape)
+    omega_row = np.empty(shape)
+    omega1 = np.empty(shape)
+    omega2 = np.empty(shape)
+    mask   = np.empty(shape, dtype=bool)
+    for i in range(num_lat):
+        omega_row[...] = omega
+        radest._ra_kernel(
+            omega_row, np.pi * averaging_period / 3600.0 / 24.0, omegaS[i][:, np.newaxis],
+            np.sin(lat[i] * np.pi / 180.0), np.cos(lat[i] * np.pi / 180.0),
+            sin_decl[:, np.newaxis], cos_decl[:, np.newaxis], dr[:, np.newaxis],
+            row, omega1, omega2, mask
+        )
+        table[i] = row
+    table.flush()
+    del table
+
+    lut = LoadLUT(path, averaging_period)
+    with open(path + ".json", "w") as f:
+        json.dump({"averaging_period": int(averaging_period), "shape": [num_lat, 366, num_hour]}, f)
+    return lut
+
+
+def LoadLUT(path, averaging_period=None):
+    """Memory-maps a lookup table saved by BuildLUT
+
+    Parameters
+    ----------
+
+    path : str
+        Table file name
+
+    averaging_period : int
+        Length of period (s); read from path + ".json" if None
+
+    Returns
+    -------
+
+    RadiationLUT
+        The table
+    """
+
+    if averaging_period is None:
+        with open(path + ".json", "r") as f:
+            averaging_period = json.load(f)["averaging_period"]
+    return RadiationLUT(np.load(path, mmap_mode="r"), averaging_period)
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    if len(sys.argv) != 5:
+        print("radlut - Program building a lookup table of extraterrestrial radiation")
+        print()
+        print("Usage:")
+        print()
+        print("  ./radlut.py <Averaging_Period> <Num_Lat> <Num_Hour> <Out_File>")
+        print()
+        print("where")
+        print()
+        print("  <Averaging_Period> is the (integer!) length of averaging periods (s)")
+        print("  <Num_Lat> is the number of grid latitudes, from -90 to 90 degrees")
+        print("  <Num_Hour> is the number of grid solar hours, from 0 to 24")
+        print("  <Out_File> is the output .npy file; a .json description is written beside it")
+        print()
+        print("The maximum interpolation error against the exact computation is printed at end.")
+        print()
+        print("This is open-source code, covered by the MIT license")
+        print()
+        sys.exit(1)
+    period   = int(sys.argv[1])
+    num_lat  = int(sys.argv[2])
+    num_hour = int(sys.argv[3])
+    out      = sys.argv[4]
+
+    # Build, then check
+    lut = BuildLUT(out, period, num_lat, num_hour)
+    abs_error, rel_error = lut.max_error()
+    print("Maximum error: %f W/m2 (%g of largest value)" % (abs_error, rel_error))
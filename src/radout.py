@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+# radout.py - Bulk output writers for the radest tools.
+#
+# Whole blocks of rows are formatted or copied at once, so that
+# output does not dominate the cost of the radiation estimates.
+#
+# This code's location:
+#
+#   https://github.com/mafavaron/radest
+#
+# This is open-source software, covered by the MIT license.
+
+import json
+import os
+import struct
+import numpy as np
+import radprof
+
+
+FORMATS = ("csv", "npy", "bin")
+
+# Chunked binary format: magic, header length (uint32), JSON header
+# listing column names and dtypes, then any number of chunks, each made
+# of a row count (int64) followed by the raw column blocks, in order.
+BIN_MAGIC = b"RADEST\x00\x01"
+
+
+def _column_dtype(column):
+    """Storage type of a column: int64 epoch seconds for time stamps,
+    float32 for real values, int64 for integers"""
+
+    column = np.asarray(column)
+    if np.issubdtype(column.dtype, np.datetime64):
+        return np.dtype('<i8')
+    if np.issubdtype(column.dtype, np.integer):
+        return np.dtype('<i8')
+    return np.dtype('<f4')
+
+
+def _column_data(column, dtype):
+    """Converts a column to its storage type"""
+
+    column = np.asarray(column)
+    if np.issubdtype(column.dtype, np.datetime64):
+        column = column.astype('datetime64[s]').astype(np.int64)
+    return column.astype(dtype, copy=False)
+
+
+class CsvWriter:
+    """Writes comma-separated text, formatting a whole block per call
+
+    Parameters
+    ----------
+
+    path : str
+        Output file name
+
+    names : list(str)
+        Column names, written as header line
+
+    row_format : str
+        printf-style format of a row, e.g. "%s, %f"; time stamps
+        are rendered in ISO form and can be formatted with "%s"
+
+    append : bool
+        If True, rows are appended to an existing file
+    """
+
+    def __init__(self, path, names, row_format=None, append=False):
+        if row_format is None:
+            row_format = ", ".join(["%s"] + ["%f"] * (len(names) - 1))
+        self.row_format = row_format + "\n"
+        self.f = open(path, "a" if append else "w")
+        if not append or self.f.tell() == 0:
+            self.f.write(", ".join(names) + "\n")
+
+    def write(self, *columns):
+        n = len(columns[0])
+        if n == 0:
+            return
+        with radprof.Stage("radout.csv", n):
+            block = np.empty((n, len(columns)), dtype=object)
+            for j, column in enumerate(columns):
+                if np.issubdtype(np.asarray(column).dtype, np.datetime64):
+                    column = np.datetime_as_string(column)
+                block[:, j] = np.asarray(column).tolist()
+            self.f.write((self.row_format * n) % tuple(block.ravel().tolist()))
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NpyWriter:
+    """Writes a memory-mappable .npy file holding a record array
+
+    Time stamps are stored as int64 epoch seconds, real values as
+    float32. The total number of rows must be known in advance; the
+    result can be read back with numpy.load(path, mmap_mode='r').
+
+    Parameters
+    ----------
+
+    path : str
+        Output file name
+
+    names : list(str)
+        Column (field) names
+
+    n : int
+        Total number of rows
+    """
+
+    def __init__(self, path, names, n):
+        if n is None:
+            raise ValueError("The npy format needs the number of rows in advance")
+        self.path  = path
+        self.names = list(names)
+        self.n     = n
+        self.i     = 0
+        self.data  = None
+
+    def write(self, *columns):
+        if self.data is None:
+            dtype = np.dtype([(name, _column_dtype(col)) for name, col in zip(self.names, columns)])
+            self.data = np.lib.format.open_memmap(self.path, mode="w+", dtype=dtype, shape=(self.n,))
+        m = len(columns[0])
+        if self.i + m > self.n:
+            raise ValueError("More rows written than declared")
+        with radprof.Stage("radout.npy", m):
+            for name, column in zip(self.names, columns):
+                self.data[name][self.i:self.i + m] = _column_data(column, self.data.dtype[name])
+        self.i += m
+
+    def close(self):
+        if self.data is not None:
+            self.data.flush()
+            del self.data
+            self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinWriter:
+    """Writes the append-friendly chunked binary format
+
+    Each call to write() appends one self-describing chunk, so a file
+    can be extended by later runs with append=True, provided the column
+    layout does not change.
+
+    Parameters
+    ----------
+
+    path : str
+        Output file name
+
+    names : list(str)
+        Column names
+    """
+
+    def __init__(self, path, names, append=False):
+        self.names  = list(names)
+        self.dtypes = None
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as g:
+                header = _read_bin_header(g)
+            if [name for name, d in header] != self.names:
+                raise ValueError("Column names do not match the existing file")
+            self.dtypes = [np.dtype(d) for name, d in header]
+            self.f = open(path, "ab")
+        else:
+            self.f = open(path, "wb")
+
+    def write(self, *columns):
+        if self.dtypes is None:
+            self.dtypes = [_column_dtype(col) for col in columns]
+            self.f.write(_bin_header(self.names, self.dtypes))
+        with radprof.Stage("radout.bin", len(columns[0])):
+            self.f.write(_bin_chunk(columns, self.dtypes))
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _bin_header(names, dtypes):
+    """Encodes the header of a chunked binary file"""
+
+    header = json.dumps([[name, d.str] for name, d in zip(names, dtypes)]).encode()
+    return BIN_MAGIC + struct.pack("<I", len(header)) + header
+
+
+def _bin_chunk(columns, dtypes):
+    """Encodes one chunk of a chunked binary file"""
+
+    parts = [struct.pack("<q", len(columns[0]))]
+    for column, dtype in zip(columns, dtypes):
+        parts.append(np.ascontiguousarray(_column_data(column, dtype)).tobytes())
+    return b"".join(parts)
+
+
+def EncodeBin(names, *columns):
+    """Encodes columns as a single-chunk binary file image, e.g. to send over a socket
+
+    Parameters
+    ----------
+
+    names : list(str)
+        Column names
+
+    columns : numpy.array
+        Column data, all of the same length
+
+    Returns
+    -------
+
+    bytes
+        Contents of the chunked binary file BinWriter would write
+    """
+
+    dtypes = [_column_dtype(col) for col in columns]
+    return _bin_header(names, dtypes) + _bin_chunk(columns, dtypes)
+
+
+def _read_bin_header(f):
+    """Reads the header of a chunked binary file, leaving f at the first chunk"""
+
+    if f.read(len(BIN_MAGIC)) != BIN_MAGIC:
+        raise ValueError("Not a radest chunked binary file")
+    size = struct.unpack("<I", f.read(4))[0]
+    return json.loads(f.read(size).decode())
+
+
+def ReadBin(path):
+    """Reads back a chunked binary file, one chunk at a time
+
+    Parameters
+    ----------
+
+    path : str
+        Input file name
+
+    Yields
+    ------
+
+    dict(str, numpy.array)
+        Columns of the chunk, by name
+    """
+
+    with open(path, "rb") as f:
+        header = _read_bin_header(f)
+        while True:
+            count = f.read(8)
+            if len(count) < 8:
+                break
+            n = struct.unpack("<q", count)[0]
+            yield {name: np.fromfile(f, dtype=np.dtype(d), count=n) for name, d in header}
+
+
+def OpenWriter(path, names, fmt="csv", n=None, row_format=None, append=False):
+    """Opens a bulk writer for the desired output format
+
+    Parameters
+    ----------
+
+    path : str
+        Output file name
+
+    names : list(str)
+        Column names
+
+    fmt : str
+        One of "csv" (text), "npy" (memory-mappable record array)
+        and "bin" (append-friendly chunked binary)
+
+    n : int
+        Total number of rows; mandatory for "npy"
+
+    row_format : str
+        printf-style row format, used by "csv" only
+
+    append : bool
+        If True, "csv" and "bin" outputs are extended instead of replaced
+
+    Returns
+    -------
+
+    CsvWriter, NpyWriter or BinWriter
+        The writer, to be fed with write(*columns) and closed after use
+    """
+
+    if fmt == "csv":
+        return CsvWriter(path, names, row_format, append)
+    if fmt == "npy":
+        return NpyWriter(path, names, n)
+    if fmt == "bin":
+        return BinWriter(path, names, append)
+    raise ValueError("Unknown output format '%s': use one of %s" % (fmt, ", ".join(FORMATS)))
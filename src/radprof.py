@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+# radprof.py - Opt-in, per-stage instrumentation of radest and its tools.
+#
+# Profiling is enabled by setting the RADEST_PROFILE environment
+# variable, or within a "with Profiling():" block. For each stage it
+# records calls, wall time, elements processed and bytes allocated at
+# peak (the latter by tracemalloc, unless RADEST_PROFILE_MEMORY=0).
+#
+# With RADEST_PROFILE=1 the report is printed as JSON to stderr at
+# exit; any other value is taken as the name of the JSON file to write.
+# When profiling is off, a stage costs one function call.
+#
+# This code's location:
+#
+#   https://github.com/mafavaron/radest
+#
+# This is open-source software, covered by the MIT license.
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+ENABLED = False
+MEMORY  = True
+
+# Stage name -> [calls, seconds, elements, peak bytes]
+_stats = {}
+_lock  = threading.Lock()
+
+# Open stages of each thread: [start time, traced memory at start, peak
+# seen by inner stages]; memory is traced process-wide, so with several
+# threads the bytes of concurrent stages overlap
+_local = threading.local()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+# Whether tracemalloc was started by Enable, and is to be stopped by Disable
+_started_tracing = False
+
+
+class _NullStage:
+    """Stage used when profiling is off: does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Stage used when profiling is on: accumulates into _stats"""
+
+    def __init__(self, name, elements):
+        self.name     = name
+        self.elements = elements
+
+    def __enter__(self):
+        stack = _stack()
+        if MEMORY and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][2] = max(stack[-1][2], peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+        stack.append([time.perf_counter(), current, 0])
+        return self
+
+    def __exit__(self, *exc):
+        stack = _stack()
+        start, current, inner_peak = stack.pop()
+        seconds = time.perf_counter() - start
+        allocated = 0
+        if MEMORY and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], inner_peak)
+            allocated = max(0, peak - current)
+            if stack:
+                stack[-1][2] = max(stack[-1][2], peak)
+        with _lock:
+            entry = _stats.setdefault(self.name, [0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += self.elements
+            entry[3]  = max(entry[3], allocated)
+        return False
+
+
+def Stage(name, elements=0):
+    """Context manager timing one stage
+
+    Parameters
+    ----------
+
+    name : str
+        Stage name, e.g. "radest.calendar"
+
+    elements : int
+        Number of elements processed by this call of the stage
+
+    Returns
+    -------
+
+    context manager
+        A no-op one if profiling is off
+    """
+
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, elements)
+
+
+def Enable(memory=True):
+    """Turns profiling on, optionally tracking memory with tracemalloc"""
+
+    global ENABLED, MEMORY, _started_tracing
+    ENABLED = True
+    MEMORY  = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+
+
+def Disable():
+    """Turns profiling off"""
+
+    global ENABLED, _started_tracing
+    ENABLED = False
+    if _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def Reset():
+    """Clears accumulated statistics"""
+
+    _stats.clear()
+
+
+def Report():
+    """Returns accumulated statistics
+
+    Returns
+    -------
+
+    dict
+        For each stage: calls, seconds, elements and bytes (largest
+        amount allocated at peak by a single call; 0 if memory is not
+        tracked)
+    """
+
+    with _lock:
+        return {
+            name: {"calls": calls, "seconds": seconds, "elements": elements, "bytes": allocated}
+            for name, (calls, seconds, elements, allocated) in _stats.items()
+        }
+
+
+def Dump(path=None):
+    """Writes the report as JSON to path, or to stderr if path is None"""
+
+    if path is None:
+        json.dump(Report(), sys.stderr, indent=1)
+        sys.stderr.write("\n")
+    else:
+        with open(path, "w") as f:
+            json.dump(Report(), f, indent=1)
+
+
+class Profiling:
+    """Context manager enabling profiling within a block
+
+    Statistics are reset on entry and remain available through Report()
+    after exit.
+
+    Parameters
+    ----------
+
+    memory : bool
+        If True, track allocated bytes with tracemalloc
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+
+    def __enter__(self):
+        self.was_enabled = ENABLED
+        Reset()
+        Enable(self.memory)
+        return self
+
+    def __exit__(self, *exc):
+        if not self.was_enabled:
+            Disable()
+        return False
+
+    def report(self):
+        return Report()
+
+
+# Environment activation
+_env = os.environ.get("RADEST_PROFILE", "")
+if _env not in ("", "0"):
+    Enable(os.environ.get("RADEST_PROFILE_MEMORY", "1") != "0")
+    atexit.register(Dump, None if _env == "1" else _env)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import radest
+import radout
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+# Largest number of time steps accepted per request
+MAX_STEPS = 10000000
+
+# Largest number of requests taken in one batch
+MAX_BATCH = 256
+
+
+class Batcher:
+    """Coalesces concurrent requests for the same station into single calls
+
+    Requests are queued, and a worker thread takes all those pending at
+    once (waiting up to window seconds for more to arrive); requests with
+    the same latitude, longitude, time zone and averaging period have
+    their time stamps concatenated and are served by one vectorized call
+    of radest.ExtraterrestrialRadiation, whose result is split back.
+    Attributes batches, groups and served count the batches drained
+    from the queue, the station groups computed and the requests served.
+
+    Parameters
+    ----------
+
+    window : double
+        Time to wait for further requests after the first (s); with 0,
+        batches are formed by the requests arriving while the previous
+        batch is computed. The window is not extended by later arrivals
+
+    max_batch : int
+        Largest number of requests in a batch; a full batch is closed
+        before its window expires
+    """
+
+    def __init__(self, window=0.0, max_batch=MAX_BATCH):
+        self.window    = window
+        self.max_batch = max_batch
+        self.queue   = queue.Queue()
+        self.batches = 0
+        self.groups  = 0
+        self.served  = 0
+        self.thread  = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, time_stamp, averaging_period, lat, lon, zone, z):
+        """Queues a request
+
+        Parameters are as in radest.ExtraterrestrialRadiation and
+        radest.GlobalRadiation, with scalar site parameters.
+
+        Returns
+        -------
+
+        concurrent.futures.Future
+            Future whose result is the global radiation vector (W/m2)
+        """
+
+        future = Future()
+        key    = (float(lat), float(lon), int(zone), int(averaging_period))
+        self.queue.put((key, np.asarray(time_stamp, dtype='datetime64[s]'), float(z), future))
+        return future
+
+    def _run(self):
+        while True:
+            pending  = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            try:
+                while len(pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0.0:
+                        pending.append(self.queue.get(timeout=remaining))
+                    else:
+                        pending.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            # Group by station, and serve each group with a single call
+            groups = {}
+            for request in pending:
+                groups.setdefault(request[0], []).append(request)
+            for (lat, lon, zone, averaging_period), requests in groups.items():
+                try:
+                    time_stamp = np.concatenate([request[1] for request in requests])
+                    ra = radest.ExtraterrestrialRadiation(time_stamp, averaging_period, lat, lon, zone)
+                    bounds = np.cumsum([len(request[1]) for request in requests])[:-1]
+                    for (key, tm, z, future), part in zip(requests, np.split(ra, bounds)):
+                        future.set_result(radest.GlobalRadiation(part, z, out=part))
+                except Exception as error:
+                    for request in requests:
+                        if not request[3].done():
+                            request[3].set_exception(error)
+                self.groups += 1
+                self.served += len(requests)
+            self.batches += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves GET /rg?lat=...&lon=...&fuse=...&height=...&initial=...&delta=...&n=...[&format=json|bin]"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            batcher = self.server.batcher
+            self._reply(200, "application/json", json.dumps({"batches": batcher.batches, "groups": batcher.groups, "served": batcher.served}).encode())
+            return
+        if url.path != "/rg":
+            self._reply(404, "text/plain", b"Unknown path\n")
+            return
+        try:
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            lat   = float(query["lat"])
+            lon   = float(query["lon"])
+            fuse  = int(query["fuse"])
+            z     = float(query["height"])
+            first = np.datetime64(query["initial"], 's')
+            delta = int(query["delta"])
+            n     = int(query["n"])
+            fmt   = query.get("format", "json")
+            if n < 0 or n > MAX_STEPS or delta <= 0 or fmt not in ("json", "bin"):
+                raise ValueError("Invalid n, delta or format")
+        except (KeyError, ValueError) as error:
+            self._reply(400, "text/plain", ("Bad request: %s\n" % error).encode())
+            return
+
+        tm = first + np.arange(n) * np.timedelta64(delta, 's')
+        try:
+            rg = self.server.batcher.submit(tm, delta, lat, lon, fuse, z).result()
+        except Exception as error:
+            self._reply(500, "text/plain", ("Error: %s\n" % error).encode())
+            return
+        if fmt == "bin":
+            self._reply(200, "application/octet-stream", radout.EncodeBin(["date", "Rg"], tm, rg))
+        else:
+            body = json.dumps({"date": tm.astype(np.int64).tolist(), "Rg": rg.tolist()}, separators=(",", ":"))
+            self._reply(200, "application/json", body.encode())
+
+    def _reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def MakeServer(port=8765, host="127.0.0.1", window=0.0):
+    """Creates the estimation service, ready for serve_forever()
+
+    Parameters
+    ----------
+
+    port : int
+        TCP port (0 for any free one, available as server.server_address[1])
+
+    host : str
+        Address to listen on; localhost by default
+
+    window : double
+        Batching window, as in Batcher (s)
+
+    Returns
+    -------
+
+    http.server.ThreadingHTTPServer
+        The server, with its Batcher as attribute batcher
+    """
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.batcher = Batcher(window)
+    return server
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    if len(sys.argv) > 3:
+        print("radserve - Local HTTP service estimating global radiation, with request batching")
+        print()
+        print("Usage:")
+        print()
+        print("  ./radserve.py [<Port> [<Window>]]")
+        print()
+        print("where")
+        print()
+        print("  <Port> is the localhost TCP port to listen on (default: 8765)")
+        print("  <Window> is the time to wait for further requests to batch (ms, default: 0)")
+        print()
+        print("Requests are of the form")
+        print()
+        print("  GET /rg?lat=<Lat>&lon=<Lon>&fuse=<Fuse>&height=<Height>&initial=<Initial_Date_Time>&delta=<Time_Step>&n=<Num_Steps>[&format=json|bin]")
+        print()
+        print("with parameters as in radlist.py; the reply holds epoch seconds 'date' and 'Rg',")
+        print("as JSON or in the chunked binary format of radlist.py --format bin.")
+        print("GET /stats gives the number of batches drained, of station groups computed")
+        print("and of requests served.")
+        print()
+        print("This is open-source code, covered by the MIT license")
+        print()
+        sys.exit(1)
+    port   = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    window = float(sys.argv[2]) / 1000.0 if len(sys.argv) > 2 else 0.0
+
+    # Serve until interrupted
+    server = MakeServer(port, window=window)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
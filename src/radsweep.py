@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+# radsweep.py - Parameter sweeps of radiation estimates over
+# latitude x longitude x time x height grids.
+#
+# The grid is computed in tiles of bounded size: each tile is a block of
+# latitudes and time stamps, covering all longitudes and heights, whose
+# stations are served by one vectorized radest call per time zone. The
+# result goes to an array, possibly a memory-mapped .npy file.
+#
+# This code's location:
+#
+#   https://github.com/mafavaron/radest
+#
+# This is open-source software, covered by the MIT license.
+
+import numpy as np
+import radest
+import radprof
+import sys
+
+
+# Largest number of result values computed per tile
+TILE_SIZE = 1 << 20
+
+# Quantities a sweep can compute: those of radest.SolarGeometry
+QUANTITIES = radest.GEOMETRY_QUANTITIES
+
+
+def _axes(lat, lon, time_stamp, z, zone):
+    """Sweep axes as vectors, with zone as a longitude vector"""
+
+    lat        = np.atleast_1d(np.asarray(lat, dtype=float))
+    lon        = np.atleast_1d(np.asarray(lon, dtype=float))
+    time_stamp = np.atleast_1d(np.asarray(time_stamp, dtype='datetime64[s]'))
+    z          = np.atleast_1d(np.asarray(z, dtype=float))
+    zone       = np.broadcast_to(np.asarray(zone, dtype=float), lon.shape)
+    if lat.ndim != 1 or lon.ndim != 1 or time_stamp.ndim != 1 or z.ndim != 1:
+        raise ValueError("Sweep axes must be scalars or vectors")
+    return lat, lon, time_stamp, z, zone
+
+
+def SweepShape(lat, lon, time_stamp, z=0.0, quantity="Rg"):
+    """Shape of the result of Sweep
+
+    Returns
+    -------
+
+    tuple(int)
+        (latitudes, longitudes, time stamps, heights) for "Rg", and
+        (latitudes, longitudes, time stamps) for the other quantities,
+        which do not depend on height
+    """
+
+    shape = (np.size(lat), np.size(lon), np.size(time_stamp))
+    return shape + (np.size(z),) if quantity == "Rg" else shape
+
+
+def Sweep(lat, lon, time_stamp, z=0.0, averaging_period=3600, zone=0, utc=False,
+          quantity="Rg", out=None, tile_size=TILE_SIZE):
+    """Computes a radiation quantity over all combinations of the axis values
+
+    Parameters
+    ----------
+
+    lat : double or numpy.array(double)
+        Latitudes (degrees, positive northwards)
+
+    lon : double or numpy.array(double)
+        Longitudes (degrees, positive eastwards)
+
+    time_stamp : numpy.datetime64 or numpy.array(numpy.datetime64)
+        Time stamps, at start of averaging period
+
+    z : double or numpy.array(double)
+        Heights above mean sea level (m); used for "Rg" only
+
+    averaging_period : int
+        Length of period (s)
+
+    zone : double or numpy.array(double)
+        Time zone (hours, positive eastwards, possibly fractional, e.g.
+        5.5), common or one per longitude
+
+    utc : bool
+        If True, time stamps are in UTC, and are moved to the local
+        standard time of each zone; if False, they are taken as local
+        standard times at all longitudes
+
+    quantity : str
+        One of QUANTITIES, as in radest.SolarGeometry
+
+    out : numpy.array(double)
+        Array receiving the result, of shape SweepShape(...), e.g. a
+        memory-mapped file; allocated if None
+
+    tile_size : int
+        Largest number of result values computed at once, apart from a
+        single latitude and time stamp, which is always a whole tile
+
+    Returns
+    -------
+
+    numpy.array(double)
+        Result, of shape SweepShape(...), indexed as
+        [latitude, longitude, time stamp(, height)]
+    """
+
+    if quantity not in QUANTITIES:
+        raise ValueError("Unknown quantity '%s': use one of %s" % (quantity, ", ".join(QUANTITIES)))
+    lat, lon, time_stamp, z, zone = _axes(lat, lon, time_stamp, z, zone)
+    shape = SweepShape(lat, lon, time_stamp, z, quantity)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError("out has shape %s, expected %s" % (out.shape, shape))
+
+    # Rg is Ra reduced by a factor depending on height only
+    factor = (0.75 + 2.0e-5*z).astype(out.dtype) if quantity == "Rg" else None
+    base   = "Ra" if quantity == "Rg" else quantity
+
+    # Longitudes sharing a time zone, served together
+    groups = [(float(fuse), np.flatnonzero(zone == fuse)) for fuse in np.unique(zone)]
+
+    # Tiles: blocks of latitudes and time stamps
+    plane      = len(lon) * (len(z) if quantity == "Rg" else 1)
+    num_times  = min(len(time_stamp), max(1, tile_size // plane))
+    num_lats   = min(len(lat), max(1, tile_size // (plane * num_times)))
+    workspace  = radest.Workspace()
+    for i_first in range(0, len(lat), num_lats):
+        i_last = min(i_first + num_lats, len(lat))
+        for t_first in range(0, len(time_stamp), num_times):
+            t_last = min(t_first + num_times, len(time_stamp))
+            with radprof.Stage("radsweep.tile", (i_last - i_first) * (t_last - t_first) * plane):
+                for fuse, j in groups:
+                    tm = time_stamp[t_first:t_last]
+                    if utc:
+                        tm = tm + np.timedelta64(int(round(fuse * 3600)), 's')
+                    stations_lat = np.repeat(lat[i_first:i_last], len(j))
+                    stations_lon = np.tile(lon[j], i_last - i_first)
+                    value = radest.SolarGeometry(tm, averaging_period, stations_lat, stations_lon,
+                                                 np.full(stations_lat.shape, fuse), quantities=(base,),
+                                                 workspace=workspace)[base]
+                    value = value.reshape(i_last - i_first, len(j), t_last - t_first)
+                    if factor is not None:
+                        value = value[..., np.newaxis] * factor
+                    out[i_first:i_last, j, t_first:t_last] = value
+    return out
+
+
+def SaveSweep(path, lat, lon, time_stamp, z=0.0, averaging_period=3600, zone=0, utc=False,
+              quantity="Rg", dtype=np.float32, tile_size=TILE_SIZE):
+    """Computes a sweep tile by tile into a memory-mappable .npy file
+
+    Parameters are as in Sweep; dtype is the type of stored values.
+
+    Returns
+    -------
+
+    numpy.memmap
+        The result, memory-mapped from path
+    """
+
+    shape = SweepShape(np.atleast_1d(lat), np.atleast_1d(lon), np.atleast_1d(time_stamp), np.atleast_1d(z), quantity)
+    out   = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    Sweep(lat, lon, time_stamp, z, averaging_period, zone, utc, quantity, out, tile_size)
+    out.flush()
+    return np.load(path, mmap_mode="r")
+
+
+def _axis(text):
+    """Axis from "<First>:<Last>:<Step>" (inclusive), or a single value"""
+
+    parts = [float(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return np.array(parts)
+    first, last, step = parts
+    return first + step * np.arange(int(np.floor((last - first) / step + 1.e-9)) + 1)
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    if len(sys.argv) != 9:
+        print("radsweep - Program computing radiation over a latitude x longitude x time x height grid")
+        print()
+        print("Usage:")
+        print()
+        print("  ./radsweep.py <Lat> <Lon> <Height> <Initial_Date_Time> <Time_Step> <Num_Steps> <Quantity> <Out_File>")
+        print()
+        print("where")
+        print()
+        print("  <Lat>, <Lon> and <Height> are axes, as <First>:<Last>:<Step> or single values")
+        print("    (degrees for latitude and longitude, m above mean sea level for height)")
+        print("  <Initial_Date_Time> is the first time stamp, in UTC, in ISO form, e.g. 2019-06-21T00:00:00")
+        print("  <Time_Step> is the (integer!) time step and averaging period (s)")
+        print("  <Num_Steps> is the number of time stamps")
+        print("  <Quantity> is one of %s" % ", ".join(QUANTITIES))
+        print("  <Out_File> is the output .npy file, indexed as [lat, lon, time(, height)]")
+        print()
+        print("Each longitude is given the time zone of its nominal meridian.")
+        print()
+        print("This is open-source code, covered by the MIT license")
+        print()
+        sys.exit(1)
+    lat      = _axis(sys.argv[1])
+    lon      = _axis(sys.argv[2])
+    z        = _axis(sys.argv[3])
+    first    = np.datetime64(sys.argv[4], 's')
+    delta    = int(sys.argv[5])
+    n        = int(sys.argv[6])
+    quantity = sys.argv[7]
+    path     = sys.argv[8]
+
+    # Sweep, with nominal time zones
+    tm   = first + np.arange(n) * np.timedelta64(delta, 's')
+    zone = np.round((np.mod(lon + 180.0, 360.0) - 180.0) / 15.0).astype(np.int64)
+    with np.errstate(invalid="ignore"):
+        result = SaveSweep(path, lat, lon, tm, z, delta, zone, True, quantity)
+    print("Written %s values, shape %s" % (result.size, result.shape))
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import radest
+import radout
+import itertools
+import os
+import sys
+import tempfile
+
+
+def ReadMeasurements(path, time_column="date", value_column="Rg", chunk_size=100000):
+    """Reads a CSV file of measured global radiation, in chunks
+
+    Parameters
+    ----------
+
+    path : str
+        Input file name; the first line holds column names
+
+    time_column : str
+        Name of the column holding ISO time stamps
+
+    value_column : str
+        Name of the column holding measured global radiation (W/m2)
+
+    chunk_size : int
+        Maximum number of lines per chunk
+
+    Yields
+    ------
+
+    (numpy.array(numpy.datetime64), numpy.array(double))
+        Time stamps and measured values of the chunk; values which
+        cannot be parsed (e.g. empty fields) are returned as NaN
+    """
+
+    with open(path, "r") as f:
+        names = [name.strip() for name in f.readline().split(",")]
+        if time_column not in names or value_column not in names:
+            raise ValueError("Columns '%s' and '%s' not found in %s" % (time_column, value_column, path))
+        i_time  = names.index(time_column)
+        i_value = names.index(value_column)
+        while True:
+            lines = [line for line in itertools.islice(f, chunk_size) if line.strip() != ""]
+            if not lines:
+                break
+            fields = [line.split(",") for line in lines]
+            dates  = np.array([field[i_time].strip() for field in fields], dtype='datetime64[s]')
+            values = [field[i_value] if len(field) > i_value else "" for field in fields]
+            try:
+                values = np.array(values, dtype=float)
+            except ValueError:
+                values = np.array([_to_float(value) for value in values])
+            yield dates, values
+
+
+def _to_float(text):
+    """Converts text to float, giving NaN if it is not a number"""
+
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def ClearSkyIndex(dates, measured, averaging_period, lat, lon, zone, z, tolerance=0.0, margin=0.0, min_estimate=1.0):
+    """Compares measured global radiation with its clear-sky estimate
+
+    radest.ExtraterrestrialRadiation gives energy per averaging period
+    (Wh/m2 per period), which equals mean power only for hourly periods:
+    the estimate is scaled by 3600 / averaging_period to mean power
+    (W/m2) before being compared with measurements.
+
+    Parameters
+    ----------
+
+    dates : numpy.array(numpy.datetime64)
+        Time stamps of measurements
+
+    measured : numpy.array(double)
+        Measured global radiation (W/m2)
+
+    averaging_period : int
+        Length of the measurement period (s)
+
+    lat, lon, zone, z : double
+        Station latitude, longitude, time zone and height, as in
+        radest.ExtraterrestrialRadiation and radest.GlobalRadiation
+
+    tolerance : double
+        Relative excess above the estimate still considered plausible
+
+    margin : double
+        Absolute excess above the estimate still considered plausible (W/m2)
+
+    min_estimate : double
+        Estimates below this (W/m2) give no ratio, to avoid dividing
+        by nighttime values
+
+    Returns
+    -------
+
+    (numpy.array(double), numpy.array(double), numpy.array(int))
+        Clear-sky estimate (W/m2, mean over period), ratio of measured to estimated value (NaN
+        where the estimate is below min_estimate), and flag: 1 where
+        the measurement exceeds the clear-sky envelope
+        estimate * (1 + tolerance) + margin, 0 otherwise
+    """
+
+    estimated = radest.ExtraterrestrialRadiation(dates, averaging_period, lat, lon, zone)
+    estimated = radest.GlobalRadiation(estimated, z, out=estimated)
+    estimated *= 3600.0 / averaging_period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(estimated >= min_estimate, measured / estimated, np.nan)
+    flag = (measured > estimated * (1.0 + tolerance) + margin).astype(int)
+    return estimated, ratio, flag
+
+
+class RunningStats:
+    """Summary statistics of a validation run, updated chunk by chunk"""
+
+    def __init__(self):
+        self.num_samples  = 0
+        self.num_valid    = 0
+        self.num_flagged  = 0
+        self.num_ratios   = 0
+        self.sum_ratio    = 0.0
+        self.sum_diff     = 0.0
+        self.sum_diff2    = 0.0
+        self.max_excess   = -np.inf
+        self.max_excess_at = None
+
+    def update(self, dates, measured, estimated, ratio, flag):
+        valid = np.isfinite(measured)
+        diff  = measured[valid] - estimated[valid]
+        self.num_samples += len(measured)
+        self.num_valid   += int(np.count_nonzero(valid))
+        self.num_flagged += int(np.count_nonzero(flag))
+        ratios = ratio[np.isfinite(ratio)]
+        self.num_ratios  += len(ratios)
+        self.sum_ratio   += float(np.sum(ratios))
+        self.sum_diff    += float(np.sum(diff))
+        self.sum_diff2   += float(np.sum(diff**2))
+        if len(diff) > 0:
+            i = int(np.argmax(diff))
+            if diff[i] > self.max_excess:
+                self.max_excess    = float(diff[i])
+                self.max_excess_at = dates[valid][i]
+
+    def summary(self):
+        """Returns the statistics accumulated so far, as a dictionary"""
+
+        return {
+            "samples":       self.num_samples,
+            "valid":         self.num_valid,
+            "flagged":       self.num_flagged,
+            "mean_ratio":    self.sum_ratio / self.num_ratios if self.num_ratios > 0 else np.nan,
+            "bias":          self.sum_diff / self.num_valid if self.num_valid > 0 else np.nan,
+            "rmse":          np.sqrt(self.sum_diff2 / self.num_valid) if self.num_valid > 0 else np.nan,
+            "max_excess":    self.max_excess if self.num_valid > 0 else np.nan,
+            "max_excess_at": str(self.max_excess_at),
+        }
+
+
+def Validate(path, averaging_period, lat, lon, zone, z, tolerance=0.0, margin=0.0, min_estimate=1.0,
+             time_column="date", value_column="Rg", chunk_size=100000, stats=None):
+    """Streams a measurement file against clear-sky estimates
+
+    Memory use is bounded by chunk_size, whatever the file size.
+
+    Parameters
+    ----------
+
+    path : str
+        Measurement file, as read by ReadMeasurements
+
+    stats : RunningStats
+        Statistics to update; a new object is used if None
+
+    Other parameters are as in ReadMeasurements and ClearSkyIndex.
+
+    Yields
+    ------
+
+    (numpy.array(numpy.datetime64), numpy.array(double), numpy.array(double), numpy.array(double), numpy.array(int))
+        Time stamps, measured and estimated values, ratios and flags
+        of each chunk; stats is up to date when each chunk is yielded
+    """
+
+    if stats is None:
+        stats = RunningStats()
+    for dates, measured in ReadMeasurements(path, time_column, value_column, chunk_size):
+        estimated, ratio, flag = ClearSkyIndex(
+            dates, measured, averaging_period, lat, lon, zone, z, tolerance, margin, min_estimate
+        )
+        stats.update(dates, measured, estimated, ratio, flag)
+        yield dates, measured, estimated, ratio, flag
+
+
+def CheckPeriods(periods=(3600, 600, 60), lat=45.0, lon=9.0, zone=1, z=0.0):
+    """Validates synthetic clear-sky files of different averaging periods
+
+    Each file holds one day of clear-sky irradiance averaged over each
+    period, from the instantaneous SOLAR_CONSTANT * dr * sin(elevation)
+    of every second, reduced as in radest.GlobalRadiation: whatever the
+    period, its mean ratio to the estimate should be about 1.
+
+    Parameters
+    ----------
+
+    periods : sequence(int)
+        Averaging periods to check (s), dividing the day
+
+    lat, lon, zone, z : double
+        Station parameters, as in ClearSkyIndex
+
+    Returns
+    -------
+
+    list((int, double, bool))
+        For each period: the period, the mean ratio, and whether it is
+        within 2% of 1
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for period in periods:
+            seconds   = np.datetime64('2019-06-21T00:00:00', 's') + np.arange(86400) * np.timedelta64(1, 's')
+            elevation = radest.SolarGeometry(seconds, 1, lat, lon, zone, quantities=("elevation",))["elevation"]
+            dr        = 1.0 + 0.033 * np.cos(2.0 * np.pi * radest.DoY(seconds) / 365.0)
+            measured  = radest.SOLAR_CONSTANT * dr * np.maximum(np.sin(elevation * np.pi / 180.0), 0.0)
+            measured  = radest.GlobalRadiation(measured.reshape(-1, period).mean(axis=1), z)
+            dates     = seconds[::period]
+            path      = os.path.join(directory, "clear_%d.csv" % period)
+            with radout.CsvWriter(path, ["date", "Rg"], "%s, %f") as f:
+                f.write(dates, measured)
+            stats = RunningStats()
+            for chunk in Validate(path, period, lat, lon, zone, z, stats=stats):
+                pass
+            ratio = stats.summary()["mean_ratio"]
+            results.append((period, ratio, bool(abs(ratio - 1.0) <= 0.02)))
+    return results
+
+
+if __name__ == "__main__":
+
+    # Get parameters
+    args      = sys.argv[1:]
+    fmt       = "csv"
+    tolerance = 0.0
+    if "--format" in args:
+        i    = args.index("--format")
+        fmt  = args[i+1] if i+1 < len(args) else ""
+        args = args[:i] + args[i+2:]
+    if "--tolerance" in args:
+        i    = args.index("--tolerance")
+        tolerance = float(args[i+1]) / 100.0 if i+1 < len(args) else -1.0
+        args = args[:i] + args[i+2:]
+    if args == ["--check"]:
+        failed = False
+        for period, ratio, ok in CheckPeriods():
+            print("%5d s  mean ratio %.4f  %s" % (period, ratio, "ok" if ok else "FAIL"))
+            failed = failed or not ok
+        sys.exit(1 if failed else 0)
+    if len(args) != 7 or fmt not in ("csv", "bin") or tolerance < 0.0:
+        print("radval - Program comparing measured global radiation with clear-sky estimates")
+        print()
+        print("Usage:")
+        print()
+        print("  ./radval.py [--format <Format>] [--tolerance <Percent>] <Lat> <Lon> <Fuse> <Height> <Averaging_Period> <In_File> <Out_File>")
+        print("  ./radval.py --check")
+        print()
+        print("where")
+        print()
+        print("  <Lat>, the latitude, is positive and increasing northwards (decimal degrees)")
+        print("  <Lon>, longitude, is positive and increasing eastwards (decimal degrees)")
+        print("  <Fuse> is an integer indicating the hours displacement from GMT")
+        print("  <Height> is the height above ground (m)")
+        print("  <Averaging_Period> is the (integer!) length of measurement periods (s)")
+        print("  <In_File> is a CSV file with columns 'date' (ISO time stamps) and 'Rg' (measurements)")
+        print("  <Out_File> receives time stamps, measured and estimated Rg, their ratio and a flag")
+        print("             set to 1 where measurements exceed the clear-sky envelope")
+        print("  <Format> is csv (default) or bin, as in radlist.py")
+        print("  <Percent> is the tolerated excess above the clear-sky estimate (default 0)")
+        print()
+        print("Measurements are mean values over their period (W/m2); the estimate, which")
+        print("radest gives as energy per period, is scaled by 3600 / <Averaging_Period>")
+        print("to match. A summary of the comparison is printed at end.")
+        print()
+        print("With --check, synthetic clear-sky files of 3600, 600 and 60 s periods are")
+        print("validated, and each must give a mean ratio of about 1.")
+        print()
+        print("This is open-source code, covered by the MIT license")
+        print()
+        sys.exit(1)
+    lat    = float(args[0])
+    lon    = float(args[1])
+    fuse   = int(args[2])
+    z      = float(args[3])
+    period = int(args[4])
+    inp    = args[5]
+    out    = args[6]
+
+    # Compare, chunk by chunk
+    stats = RunningStats()
+    f = radout.OpenWriter(out, ["date", "Rg.meas", "Rg.est", "ratio", "flag"], fmt, row_format="%s, %f, %f, %f, %d")
+    for chunk in Validate(inp, period, lat, lon, fuse, z, tolerance, stats=stats):
+        f.write(*chunk)
+    f.close()
+
+    # Print summary
+    for name, value in stats.summary().items():
+        print("%s: %s" % (name, value))
@@ -2,6 +2,8 @@
 
 import numpy as np
 import radest
+import radout
+import radprof
 import os
 import sys
 
@@ -33,34 +35,14 @@ if __name__ == "__main__":
     year  = int(sys.argv[4])
     out   = sys.argv[5]
 
-    # Main loop: Iterate over all days in dsired year, and process them
-    initial_date = np.datetime64("%4.4d-01-01T00:00:00" % year, 's')
-    final_date   = np.datetime64("%4.4d-01-01T00:00:00" % (year+1), 's')
-    num_days     = ((final_date - initial_date) / np.timedelta64(1, 'D')).astype(int)
-    days         = np.array([np.datetime64('2000-01-01', 'D') for i in range(num_days)])
-    time_eq      = np.array([0.0 for i in range(num_days)])
-    for day in range(num_days):
-
-        start_of_day = initial_date + np.timedelta64(day, 'D')
-        print(start_of_day)
-
-        # Compute extraterrestrial radiation for all seconds in this day
-        time_stamp = np.array([start_of_day + np.timedelta64(sec, 's') for sec in range(86400)])
-        ra         = radest.ExtraterrestrialRadiation(time_stamp, 1, lat, lon, fuse)
-
-        # Find the index corresponding to the maximum extraterrestrial radiation
-        # and use it to calculate the time stamp at which it occurs
-        idx_max_ra  = np.argmax(ra)
-        time_max_ra = time_stamp[idx_max_ra]
-
-        # Compute difference from noon, and save it
-        noon = start_of_day + np.timedelta64(12, 'h')
-        days[day]    = start_of_day
-        time_eq[day] = (time_max_ra - noon) / np.timedelta64(1, 's')
-
-    # Print results
-    f = open(out, "w")
-    f.write("date, tm.eqn\n")
-    for i in range(len(days)):
-        f.write("%s, %f\n" % (str(days[i]), time_eq[i]))
-    f.close()
+    # Compute the solar noon offset for all days in desired year, in closed form
+    initial_date = np.datetime64("%4.4d-01-01" % year, 'D')
+    final_date   = np.datetime64("%4.4d-01-01" % (year+1), 'D')
+    days         = np.arange(initial_date, final_date)
+    with radprof.Stage("timeq", len(days)):
+        time_eq, sunrise, sunset = radest.SolarTimes(days, lat, lon, fuse)
+
+        # Print results
+        f = radout.CsvWriter(out, ["date", "tm.eqn"])
+        f.write(days, time_eq)
+        f.close()